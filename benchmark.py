@@ -0,0 +1,262 @@
+"""
+--- SpaceAI benchmarks ---
+
+Times hot paths of the simulation for different population sizes and NEURONS values:
+    - decide - single Pilot.decide call
+    - brain_decide - batched decisions of whole population (PopulationBrain.decide)
+    - tick - full population tick (collisions, passing obstacles, ship updates, obstacle updates)
+    - evolve - Population.evolve
+    - draw - Drawer.draw_game in offscreen (headless) window
+
+Every NEURONS value is measured in separate process, as NEURONS is read by modules at import time.
+Results are written as JSON (ops/sec, p50/p99 latency). Compare mode flags results slower than stored baseline.
+
+Usage:
+    python -m benchmark --out bench.json
+    python -m benchmark --sizes 200 2000 --neurons 8 16 --out bench.json --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+DEFAULT_SIZES = (200, 2000, 20000)
+DEFAULT_NEURONS = (8,)
+
+
+def measure(name, func, setup=None, min_time=1.0, min_ops=5, max_ops=100000, **params):
+    """
+    Calls func repeatedly (setup, if given, is called before every call and is not timed) for at least min_time
+    seconds and min_ops calls. Returns dictionary with ops/sec and latency percentiles.
+    """
+
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_ops and (len(samples) < min_ops or time.perf_counter() - start < min_time):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - t0)
+
+    samples = np.array(samples) / 1e6  # ms
+    return {
+        "name": name,
+        **params,
+        "samples": len(samples),
+        "ops_per_sec": 1000 / samples.mean(),
+        "mean_ms": samples.mean(),
+        "p50_ms": np.percentile(samples, 50),
+        "p99_ms": np.percentile(samples, 99),
+    }
+
+
+def bench_config(neurons, sizes, min_time, draw=True):
+    """Runs all benchmarks for one NEURONS value (must be called in fresh process). Returns list of results. """
+
+    import settings
+    settings.NEURONS = neurons
+    settings.HIDDEN_LAYERS = [neurons]
+
+    if draw:
+        import pyglet
+        pyglet.options["headless"] = True
+
+    from game_classes import Population, Pilot
+    from simulation_engine import SimulationEngine
+
+    results = []
+    rng = np.random.default_rng(0)
+
+    # --- Pilot.decide ---
+    pilot = Pilot(rng=rng)
+    results.append(measure("decide", lambda: pilot.decide(320, 200, 350), min_time=min_time,
+                           population=None, neurons=neurons))
+
+    game = None
+    for size in sizes:
+        population = Population(size=size, rng=np.random.default_rng(0))
+        population.populate()
+        engine = SimulationEngine(population=population, course_seed=0)
+        engine.setup()
+        store = population.store
+        idx = np.arange(size)
+
+        # --- Batched decisions ---
+        results.append(measure("brain_decide", lambda: population.brain.decide(store.position_x, 200, 350, idx),
+                               min_time=min_time, population=size, neurons=neurons))
+
+        # --- Population tick (all ships alive before every tick) ---
+        def revive():
+            store.alive[:] = True
+
+        results.append(measure("tick", engine.step, setup=revive, min_time=min_time,
+                               population=size, neurons=neurons))
+
+        # --- Evolution ---
+        def random_fitness():
+            store.fitness[:] = rng.random(size)
+
+        results.append(measure("evolve", population.evolve, setup=random_fitness, min_time=min_time,
+                               population=size, neurons=neurons))
+
+        # --- Drawing ---
+        if draw:
+            try:
+                if game is None:
+                    game = make_offscreen_game()
+                results.append(bench_draw(game, engine, min_time, size, neurons))
+            except Exception as exc:
+                print(f"draw benchmark skipped: {exc!r}", file=sys.stderr)
+                draw = False
+
+    return results
+
+
+def make_offscreen_game():
+    """Creates MyGame in offscreen window (pyglet headless mode). """
+
+    from main import MyGame
+    from settings import SCREEN_WIDTH, SCREEN_HEIGHT, GAME_RUNNING
+
+    game = MyGame(SCREEN_WIDTH, SCREEN_HEIGHT, "spaceAI benchmark")
+    game.simulation_mode = True
+    game.AI_mode = True
+    game.current_state = GAME_RUNNING
+
+    return game
+
+
+def bench_draw(game, engine, min_time, size, neurons):
+    """Times Drawer.draw_game of engine's population and obstacles (GPU work included). """
+
+    game.population = engine.population
+    game.obstacle_list = engine.obstacle_list
+    game.closest_obstacle = engine.closest_obstacle
+    game.score = engine.score
+    engine.population.store.alive[:] = True
+
+    def draw():
+        game.clear()
+        game.draw_game()
+        game.ctx.finish()
+
+    return measure("draw", draw, min_time=min_time, population=size, neurons=neurons)
+
+
+def run_benchmarks(sizes, neurons_list, min_time, draw):
+    """Runs benchmarks for every NEURONS value in separate process. Returns results document. """
+
+    results = []
+    for neurons in neurons_list:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out = os.path.join(tmp_dir, "results.json")
+            cmd = [sys.executable, "-m", "benchmark", "--worker", "--neurons", str(neurons),
+                   "--sizes", *map(str, sizes), "--min-time", str(min_time), "--out", out]
+            if not draw:
+                cmd.append("--no-draw")
+            subprocess.run(cmd, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+            with open(out) as f:
+                results.extend(json.load(f))
+
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+        },
+        "results": results,
+    }
+
+
+def result_key(result):
+    return result["name"], result["population"], result["neurons"]
+
+
+def compare(results, baseline, threshold):
+    """Returns list of results with ops/sec lower than in baseline by more than threshold (fraction). """
+
+    baseline_results = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+
+    for result in results["results"]:
+        base = baseline_results.get(result_key(result))
+        if base is None:
+            continue
+
+        change = result["ops_per_sec"] / base["ops_per_sec"] - 1
+        result["change"] = change
+        if change < -threshold:
+            regressions.append(result)
+
+    return regressions
+
+
+def print_results(results):
+    """Prints results as table. """
+
+    print(f"{'benchmark':<14}{'population':>11}{'neurons':>9}{'ops/sec':>14}{'p50 ms':>11}{'p99 ms':>11}{'change':>9}")
+    for r in results["results"]:
+        change = f"{r['change']:+.1%}" if "change" in r else ""
+        print(f"{r['name']:<14}{str(r['population'] or '-'):>11}{r['neurons']:>9}{r['ops_per_sec']:>14.1f}"
+              f"{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{change:>9}")
+
+
+def parse_args(args=None):
+    """Parses command line arguments. """
+
+    parser = argparse.ArgumentParser(description="spaceAI hot path benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="population sizes")
+    parser.add_argument("--neurons", type=int, nargs="+", default=DEFAULT_NEURONS, help="NEURONS values")
+    parser.add_argument("--min-time", type=float, default=1.0, help="minimal time of every benchmark in seconds")
+    parser.add_argument("--no-draw", action="store_true", help="skip drawing benchmark")
+    parser.add_argument("--out", help="JSON file for results")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON file with baseline results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="ops/sec drop (fraction) reported as regression in compare mode")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    if args.worker:
+        results = bench_config(args.neurons[0], args.sizes, args.min_time, draw=not args.no_draw)
+        with open(args.out, "w") as f:
+            json.dump(results, f)
+        return 0
+
+    results = run_benchmarks(args.sizes, args.neurons, args.min_time, draw=not args.no_draw)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    print_results(results)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    for r in regressions:
+        print(f"REGRESSION: {r['name']} population={r['population']} neurons={r['neurons']} "
+              f"{r['change']:+.1%} ops/sec", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Population-level brain - neural networks of all pilots evaluated together with batched matrix multiplications
+"""
+import numpy as np
+
+from settings import *
+from ext_functions import GENE_BOUNDS, GENE_SHAPES, LAYER_SIZES, LAYERS
+
+
+class PopulationBrain:
+    """
+    Genotypes of all pilots in population viewed as 3-D tensors (one 2-D matrix per pilot and layer), so decisions
+    of whole population are computed with single batched multiplication per layer instead of separate np.dot per ship.
+    Network is multilayer perceptron with any number of hidden layers (LAYER_SIZES, see HIDDEN_LAYERS in settings.py).
+
+    Activations of every layer (and genomes of selected pilots) are written to preallocated buffers, which are reused
+    from frame to frame - decide allocates no arrays proportional to network size. Buffers grow when more rows are
+    needed (e.g. the same pilots on many courses in VectorEnv) and have dtype of genome matrix (float32 or float16).
+
+    With policy table (see PolicyTable) decisions are looked up instead of evaluating network every frame.
+
+    Methods:
+        - load - builds tensors from genome matrix
+        - reserve - makes buffers big enough for given number of rows
+        - use_policy_table - switches policy table mode
+        - decide - makes decisions for selected pilots (with policy table if used)
+        - network - makes decisions for selected pilots by evaluating their networks
+        - network_positions - makes decisions for selected pilots at many positions (weights gathered once per pilot)
+    """
+
+    def __init__(self, policy_table=POLICY_TABLE):
+
+        # Genome matrix and weights (N, outputs, inputs) and biases (N, outputs) of every layer - views into it
+        self.genomes = None
+        self.weights = []
+        self.biases = []
+        self.all_idx = np.arange(0)
+
+        # Preallocated buffers - activations of every layer (rows, layer size) incl. input and genomes of selected
+        # pilots (rows, GENOME_LEN) with weights and biases views into them
+        self.capacity = 0
+        self.activations = []
+        self.genomes_buffer = None
+        self.weights_buffers = []
+        self.biases_buffers = []
+
+        # Activations of every layer for network_positions (pilots, layer size, positions), grown when needed
+        self.positions_activations = []
+
+        # Per-obstacle lookup table of decisions (None - network is evaluated every frame) and its mode
+        self.table = None
+        self.policy_table = "off"
+        self.use_policy_table(policy_table)
+
+    @staticmethod
+    def layers(genomes):
+        """Returns lists of weights and biases of every layer - views into genome matrix. """
+
+        size = len(genomes)
+        genes = [genomes[:, start:stop] for start, stop in zip(GENE_BOUNDS[:-1], GENE_BOUNDS[1:])]
+
+        return ([gene.reshape(size, *shape) for gene, shape in zip(genes[:LAYERS], GENE_SHAPES[:LAYERS])],
+                genes[LAYERS:])
+
+    def load(self, genomes):
+        """Builds population tensors as views into genome matrix (one flat genome per row, see flatten_genes). """
+
+        self.genomes = genomes
+        self.weights, self.biases = self.layers(genomes)
+        self.all_idx = np.arange(len(genomes))
+
+        if self.genomes_buffer is not None and self.genomes_buffer.dtype != genomes.dtype:
+            self.capacity = 0
+        self.reserve(len(genomes))
+
+        if self.table is not None:
+            self.table.reset(len(genomes))
+
+    def reserve(self, rows):
+        """Reallocates buffers (for at least twice as many rows) if they have less than given number of rows. """
+
+        if rows <= self.capacity:
+            return
+
+        dtype = self.genomes.dtype
+        self.capacity = max(rows, 2 * self.capacity)
+        self.activations = [np.empty((self.capacity, n), dtype=dtype) for n in LAYER_SIZES]
+        self.genomes_buffer = np.empty((self.capacity, self.genomes.shape[1]), dtype=dtype)
+        self.weights_buffers, self.biases_buffers = self.layers(self.genomes_buffer)
+
+    def use_policy_table(self, mode):
+        """Switches policy table mode: "off", "eager" or "lazy" (see PolicyTable). """
+
+        if mode not in ("off", "eager", "lazy"):
+            raise ValueError(f"Unknown policy table mode: {mode} (expected 'off', 'eager' or 'lazy')")
+
+        self.policy_table = mode
+        self.table = PolicyTable(self, eager=mode == "eager") if mode != "off" else None
+        if self.table is not None and self.genomes is not None:
+            self.table.reset(len(self.genomes))
+
+    def decide(self, x_ships, gap_x1, gap_x2, idx):
+        """
+        Makes decisions for pilots with indices idx, same network as in Pilot.decide. Decisions are taken from policy
+        table if it is used (gap of every ship is the same - one obstacle course).
+        Input: x_ships - x coordinates of ships (same length as idx), gap_x1, gap_x2 - closest obstacle gap
+        Returns: Numpy array with decisions: 0 - STAY, 1 - LEFT, 2 - RIGHT
+        """
+
+        if self.table is not None and np.ndim(gap_x1) == 0:
+            return self.table.decide(x_ships, gap_x1, gap_x2, idx)
+
+        return self.network(x_ships, gap_x1, gap_x2, idx)
+
+    def network(self, x_ships, gap_x1, gap_x2, idx):
+        """Makes decisions for pilots with indices idx by evaluating their networks (see decide). """
+
+        rows = len(idx)
+        self.reserve(rows)
+
+        # All pilots in order (e.g. all ships alive) - weights are used directly, otherwise genomes of selected
+        # pilots are gathered into buffer (one take of whole rows, mode="clip" does not buffer out)
+        all_pilots = rows == len(self.all_idx) and np.array_equal(idx, self.all_idx)
+        if all_pilots:
+            weights, biases = self.weights, self.biases
+        else:
+            np.take(self.genomes, idx, axis=0, out=self.genomes_buffer[:rows], mode="clip")
+            weights, biases = self.weights_buffers, self.biases_buffers
+
+        layer = self.activations[0][:rows]
+        layer[:, 0] = x_ships
+        layer[:, 1] = gap_x1
+        layer[:, 2] = gap_x2
+        layer /= SCREEN_WIDTH
+
+        for i in range(LAYERS):
+            out = self.activations[i + 1][:rows]
+            np.einsum("nij,nj->ni", weights[i][:rows], layer, out=out)
+            out += biases[i][:rows]
+            np.maximum(out, 0, out=out)     # relu
+            layer = out
+
+        # Softmax does not change order of outputs, so argmax of relu outputs is the decision
+        return np.argmax(layer, axis=1)
+
+    def network_positions(self, positions, gap_x1, gap_x2, idx):
+        """
+        Makes decisions for pilots with indices idx at every x position in positions (the same gap). Genomes of
+        pilots are gathered once and each layer is one einsum of pilot's weights with activations of all positions
+        (positions are the last, contiguous axis), same arithmetic as network called for every (pilot, position) pair.
+        Returns: Numpy array (len(idx), len(positions)) with decisions
+        """
+
+        rows, cols = len(idx), len(positions)
+        self.reserve(rows)
+        np.take(self.genomes, idx, axis=0, out=self.genomes_buffer[:rows], mode="clip")
+
+        # Activations (pilots, layer size, positions) - reallocated only for more pilots or other positions
+        activations = self.positions_activations
+        if not activations or activations[0].shape[0] < rows or activations[0].shape[2] != cols or \
+                activations[0].dtype != self.genomes.dtype:
+            self.positions_activations = activations = [np.empty((rows, n, cols), dtype=self.genomes.dtype)
+                                                        for n in LAYER_SIZES]
+
+        layer = activations[0][:rows]
+        layer[:, 0] = positions
+        layer[:, 1] = gap_x1
+        layer[:, 2] = gap_x2
+        layer /= SCREEN_WIDTH
+
+        for i in range(LAYERS):
+            out = activations[i + 1][:rows]
+            np.einsum("nij,njp->nip", self.weights_buffers[i][:rows], layer, out=out)
+            out += self.biases_buffers[i][:rows, :, None]
+            np.maximum(out, 0, out=out)     # relu
+            layer = out
+
+        return np.argmax(layer, axis=1)
+
+
+def reachable_positions(start=int(SCREEN_WIDTH / 2), step=MOVEMENT_SPEED, half_width=15):
+    """Returns sorted x positions which ship starting at start reaches with moves by step (clamped to screen edges). """
+
+    low, high = half_width, SCREEN_WIDTH - half_width
+    reached = {start}
+    stack = [start]
+    while stack:
+        x = stack.pop()
+        for next_x in (max(x - step, low), min(x + step, high)):
+            if next_x not in reached:
+                reached.add(next_x)
+                stack.append(next_x)
+
+    return np.array(sorted(reached))
+
+
+class PolicyTable:
+    """
+    Decisions of pilots as lookup table (pilots, x positions). Network input is (x_ship, gap_x1, gap_x2) and gap stays
+    the same until closest obstacle changes, so for current obstacle decision of every pilot depends on x only.
+    Ships start in the middle of the screen and move by MOVEMENT_SPEED (clamped to screen edges), so table holds only
+    x positions reachable this way (POLICY_TABLE_LATTICE, otherwise every x between screen edges).
+
+    When gap changes, table is cleared and:
+        - eager - decisions of all given pilots at all positions are made in one batched network pass (in chunks of
+          CHUNK_ROWS rows), frames then only look decisions up
+        - lazy - decisions are made when pilot first visits position (network is evaluated only for these pilots)
+    Decisions are made by the same network as without table (eager - batched over positions with weights of every pilot
+    gathered once, see network_positions), so they are exactly the same.
+
+    Methods:
+        - reset - clears table for population of given size
+        - build - fills table rows of given pilots for all positions
+        - decide - looks decisions up (missing ones are made by network and stored)
+    """
+
+    UNKNOWN = 255
+    CHUNK_ROWS = 1 << 16
+
+    def __init__(self, brain, eager=True, lattice=POLICY_TABLE_LATTICE, half_width=15):
+
+        self.brain = brain
+        self.eager = eager
+
+        # Positions in table and column of every x (-1 - position not in table)
+        if lattice:
+            self.positions = reachable_positions(half_width=half_width)
+        else:
+            self.positions = np.arange(half_width, SCREEN_WIDTH - half_width + 1)
+        self.columns = np.full(SCREEN_WIDTH + 1, -1, dtype=np.int64)
+        self.columns[self.positions] = np.arange(len(self.positions))
+
+        self.table = np.zeros((0, len(self.positions)), dtype=np.uint8)
+        self.gap = None
+
+    def reset(self, size):
+        """Clears table (new genomes) for population of given size. """
+
+        if len(self.table) != size:
+            self.table = np.empty((size, len(self.positions)), dtype=np.uint8)
+        self.table.fill(self.UNKNOWN)
+        self.gap = None
+
+    def build(self, idx, gap_x1, gap_x2):
+        """Fills table rows of pilots with indices idx - decisions at all positions for given gap. """
+
+        positions = self.positions
+        chunk = max(self.CHUNK_ROWS // len(positions), 1)
+
+        for start in range(0, len(idx), chunk):
+            pilots = idx[start:start + chunk]
+            self.table[pilots] = self.brain.network_positions(positions, gap_x1, gap_x2, pilots)
+
+    def decide(self, x_ships, gap_x1, gap_x2, idx):
+        """Returns decisions of pilots with indices idx at positions x_ships (see PopulationBrain.decide). """
+
+        if self.gap != (gap_x1, gap_x2):
+            self.gap = (gap_x1, gap_x2)
+            self.table.fill(self.UNKNOWN)
+            if self.eager:
+                self.build(np.asarray(idx), gap_x1, gap_x2)
+
+        columns = self.columns[x_ships]
+        decisions = np.full(len(idx), self.UNKNOWN, dtype=np.uint8)
+        in_table = columns >= 0
+        decisions[in_table] = self.table[idx[in_table], columns[in_table]]
+
+        # Positions not in table or not decided yet (lazy) - network decides, decisions are stored
+        missing = np.flatnonzero(decisions == self.UNKNOWN)
+        if missing.size:
+            decisions[missing] = self.brain.network(x_ships[missing], gap_x1, gap_x2, idx[missing])
+            stored = missing[in_table[missing]]
+            self.table[idx[stored], columns[stored]] = decisions[stored]
+
+        return decisions
@@ -0,0 +1,115 @@
+"""
+Population checkpoints - genomes, fitness, pilots' stats, generation id and RNG state saved to single .npz file
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from settings import *
+
+
+def population_state(population):
+    """Returns copy of population state (dictionary of numpy arrays) which can be saved as checkpoint. """
+
+    store = population.store
+
+    return {
+        "generation_id": np.array(population.generation_id),
+        "genomes": store.genomes.copy(),
+        "fitness": store.fitness.copy(),
+        "pilot_score": store.pilot_score.copy(),
+        "stay_decs_count": store.stay_decs_count.copy(),
+        "move_decs_count": store.move_decs_count.copy(),
+        # State of population's random generator (bit generator state as JSON)
+        "rng_state": np.array(json.dumps(population.rng.bit_generator.state)),
+    }
+
+
+def write_checkpoint(state, path):
+    """Writes population state to file. File is replaced atomically, so interrupted write never breaks checkpoint. """
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **state)
+    os.replace(tmp_path, path)
+
+
+def save_checkpoint(population, path):
+    """Saves population checkpoint to .npz file. """
+
+    write_checkpoint(population_state(population), path)
+
+
+def load_checkpoint(population, path):
+    """
+    Loads checkpoint from file into population (population is populated if needed) and restores state of its
+    random generator.
+    Population size must match checkpoint.
+    """
+
+    with np.load(path) as checkpoint:
+
+        if population.store is None:
+            population.populate()
+
+        store = population.store
+        if checkpoint["genomes"].shape != store.genomes.shape:
+            raise ValueError(f"Checkpoint genomes shape {checkpoint['genomes'].shape} does not match "
+                             f"population genomes shape {store.genomes.shape}")
+
+        population.generation_id = int(checkpoint["generation_id"])
+        population.set_genomes(checkpoint["genomes"])
+        store.fitness[:] = checkpoint["fitness"]
+        store.pilot_score[:] = checkpoint["pilot_score"]
+        store.stay_decs_count[:] = checkpoint["stay_decs_count"]
+        store.move_decs_count[:] = checkpoint["move_decs_count"]
+
+        population.rng.bit_generator.state = json.loads(str(checkpoint["rng_state"]))
+
+
+class Checkpointer:
+    """
+    Periodic checkpointing - every `every` generations population state is copied in memory and written to disk
+    by background thread, so game / simulation loop does not wait for disk.
+
+    Methods:
+        - on_generation - saves checkpoint if generation number is multiple of `every`
+        - close - waits for pending writes
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, every=CHECKPOINT_EVERY):
+
+        self.directory = directory
+        self.every = every
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.last_write = None
+
+    def path(self, generation_id):
+        """Returns path of checkpoint file for given generation. """
+
+        return os.path.join(self.directory, f"gen_{generation_id:06d}.npz")
+
+    def on_generation(self, population):
+        """Saves checkpoint of population in background if its generation number is multiple of `every`. """
+
+        if not self.every or population.generation_id % self.every:
+            return
+
+        state = population_state(population)
+        self.last_write = self.writer.submit(self.write, state, population.generation_id)
+
+    def write(self, state, generation_id):
+        """Writes state to generation checkpoint file and to 'latest.npz'. """
+
+        write_checkpoint(state, self.path(generation_id))
+        write_checkpoint(state, os.path.join(self.directory, "latest.npz"))
+
+    def close(self):
+        """Waits for pending writes and stops writer thread. """
+
+        self.writer.shutdown(wait=True)
@@ -21,13 +21,7 @@ class CollisionSystem:
         # --- COLLISONS IN SIMULATION MODE (MULTIPLE SHIPS) ---
         if self.simulation_mode:
 
-            for ship in self.population.ships_list:
-                if ship.alive:
-                    if 0 <= ship.position_x <= clo_obst_x1 or clo_obst_x2 <= ship.position_x <= 640:
-                        if ship.center_y >= clo_obst_bot_edge:
-                            ship.alive = False
-                            ship.pilot.pilot_score = self.score
-                            ship.pilot.calc_fitness()
+            self.population.collide(clo_obst_x1, clo_obst_x2, clo_obst_bot_edge, self.score)
 
         # --- COLLISIONS IN SINGLE SHIP MODE ---
         else:
@@ -40,6 +34,22 @@ class CollisionSystem:
                     for obstacle in self.obstacle_list:
                         obstacle.is_active = False
 
+    def check_episode_end(self):
+        """
+        Ends generation (simulation mode) before all ships are dead when tick / score budget is used up
+        (max_episode_ticks, max_episode_score, 0 - no limit) or when early_cutoff is on and selection can no longer
+        change. Living pilots get their fitness for current score. Returns True if generation was ended.
+        """
+
+        over_budget = ((self.max_episode_ticks and self.steps >= self.max_episode_ticks) or
+                       (self.max_episode_score and self.score >= self.max_episode_score))
+
+        if over_budget or (self.early_cutoff and self.population.selection_decided(self.score)):
+            self.population.finish_episode(self.score)
+            return True
+
+        return False
+
     def ident_clos_obstacle(self):
         """Identifies closest obstacle. """
 
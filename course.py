@@ -0,0 +1,51 @@
+"""
+Obstacle course - deterministic sequence of obstacle gaps generated from seed
+"""
+import numpy as np
+
+
+class Course:
+    """
+    Sequence of gaps (gap_x1, gap_x2) of obstacles in the order they are spawned. Gaps are generated up front from
+    seed in blocks, so the same seed always gives the same course no matter how many obstacles are used.
+
+    Methods:
+        - gaps - returns first n gaps of the course
+        - next_gap - returns next gap of the course (used by spawning / respawning obstacles)
+    """
+
+    BLOCK = 1024
+
+    def __init__(self, seed=None):
+
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.gap_x1 = np.zeros(0, dtype=np.int64)
+        self.gap_x2 = np.zeros(0, dtype=np.int64)
+        self.cursor = 0
+
+    def extend(self, n):
+        """Generates gaps until course has at least n obstacles. """
+
+        while len(self.gap_x1) < n:
+            # left edge x_position from 0 to 440, right edge 100 to 200 pixels from left x_position
+            gap_x1 = self.rng.integers(0, 440, size=self.BLOCK)
+            gap_x2 = gap_x1 + self.rng.integers(100, 200, size=self.BLOCK)
+
+            self.gap_x1 = np.concatenate((self.gap_x1, gap_x1))
+            self.gap_x2 = np.concatenate((self.gap_x2, gap_x2))
+
+    def gaps(self, n):
+        """Returns (gap_x1, gap_x2) arrays with first n gaps of the course. """
+
+        self.extend(n)
+        return self.gap_x1[:n], self.gap_x2[:n]
+
+    def next_gap(self):
+        """Returns next gap of the course. """
+
+        self.extend(self.cursor + 1)
+        gap = int(self.gap_x1[self.cursor]), int(self.gap_x2[self.cursor])
+        self.cursor += 1
+
+        return gap
@@ -1,7 +1,25 @@
 import arcade
+import numpy as np
 from settings import *
 
 
+# --- Textures ---
+SHIP_TEXTURE = "images/spaceShips_008.png"
+OBSTACLE_TEXTURE = "images/spaceBuilding_016.png"
+SHIP_SCALE = .5
+
+textures_cache = {}
+
+
+def get_texture(file_name):
+    """Loads texture from file once, following calls return cached texture. """
+
+    if file_name not in textures_cache:
+        textures_cache[file_name] = arcade.load_texture(file_name)
+
+    return textures_cache[file_name]
+
+
 class Drawer:
     """
     Helper class - collection of method used by MyGame class to draw different possible scenarios, like:
@@ -9,6 +27,10 @@ class Drawer:
     - menu screens
     - game over screen
     - bottom bar with score/additional information
+
+    In simulation mode ships and obstacles are drawn with batched sprite lists (ship_sprites, obstacle_sprites) which
+    are built once and only have their positions updated. Texts are cached in text_cache.
+    Positions of ships and obstacles are interpolated between the last two time steps with render_alpha.
     """
 
     def draw_game(self):
@@ -19,13 +41,21 @@ class Drawer:
         """
 
         if self.simulation_mode:
-            for ship in self.population.ships_list:
-                ship.draw()
+            self.draw_population()
+            self.draw_obstacles()
+
+            if self.turbo:
+                self.draw_cached_text(f"TURBO x{self.turbo_steps}", SCREEN_WIDTH - 120, SCREEN_HEIGHT - 22,
+                                      arcade.color.YELLOW, 13)
         else:
-            self.ship.draw()
+            self.ship.draw(self.render_alpha)
+
+            for obstacle in self.obstacle_list:
+                obstacle.draw(self.render_alpha)
 
-        for obstacle in self.obstacle_list:
-            obstacle.draw()
+            if self.replay is not None:
+                self.draw_cached_text(f"REPLAY gen_id: {self.replay.generation_id} x{self.replay_speed}",
+                                      SCREEN_WIDTH - 230, SCREEN_HEIGHT - 22, arcade.color.YELLOW, 13)
 
         self.draw_bottom_bar(score=self.score,
                              simulation_mode=self.simulation_mode,
@@ -35,6 +65,73 @@ class Drawer:
                              gap_x2=self.obstacle_list[self.closest_obstacle].gap_x2,
                              pos_y=self.obstacle_list[self.closest_obstacle].position_y)
 
+    def draw_population(self):
+        """Draws living ships of population with one sprite list (one sprite per ship, dead ships are hidden). """
+
+        store = self.population.store
+
+        # Sprite list is built once per population store
+        if self.ship_sprites is None or self.ship_sprites_store is not store:
+            self.ship_sprites = arcade.SpriteList()
+            for i in range(len(store.alive)):
+                self.ship_sprites.append(arcade.Sprite(texture=get_texture(SHIP_TEXTURE), scale=SHIP_SCALE,
+                                                       center_y=store.center_y))
+            self.ship_sprites_store = store
+            self.ship_sprites_visible = np.ones(len(store.alive), dtype=bool)
+
+        # Show / hide only sprites of ships which were resurrected / died since last frame
+        for i in np.flatnonzero(self.ship_sprites_visible != store.alive):
+            self.ship_sprites[i].visible = bool(store.alive[i])
+        self.ship_sprites_visible[:] = store.alive
+
+        living_idx = np.flatnonzero(store.alive)
+        prev_x = store.prev_position_x[living_idx]
+        position_x = prev_x + self.render_alpha * (store.position_x[living_idx] - prev_x)
+        for i, x in zip(living_idx, position_x.tolist()):
+            self.ship_sprites[i].center_x = x
+
+        self.ship_sprites.draw()
+
+    def draw_obstacles(self):
+        """Draws obstacles with one sprite list (two sprites - left and right part - per obstacle). """
+
+        if any(not obstacle.is_textured for obstacle in self.obstacle_list):
+            for obstacle in self.obstacle_list:
+                obstacle.draw(self.render_alpha)
+            return
+
+        if self.obstacle_sprites is None:
+            self.obstacle_sprites = arcade.SpriteList()
+            for i in range(2 * NO_OBSTACLES):
+                self.obstacle_sprites.append(arcade.Sprite(texture=get_texture(OBSTACLE_TEXTURE)))
+
+        for obstacle, left, right in zip(self.obstacle_list, self.obstacle_sprites[::2], self.obstacle_sprites[1::2]):
+            for sprite, center_x, width in ((left, 0.5 * obstacle.gap_x1, obstacle.gap_x1),
+                                            (right, 0.5 * (SCREEN_WIDTH + obstacle.gap_x2),
+                                             SCREEN_WIDTH - obstacle.gap_x2)):
+                sprite.visible = width > 0
+                if width > 0:
+                    sprite.width = width
+                    sprite.height = obstacle.thickness
+                    sprite.center_x = center_x
+                    sprite.center_y = obstacle.render_y(self.render_alpha)
+
+        self.obstacle_sprites.draw()
+
+    def draw_cached_text(self, text, start_x, start_y, color, font_size):
+        """Draws text using arcade.Text object cached per position - layout is rebuilt only when text changes. """
+
+        key = (start_x, start_y, font_size)
+        text_obj = self.text_cache.get(key)
+
+        if text_obj is None:
+            text_obj = arcade.Text(text, start_x, start_y, color, font_size)
+            self.text_cache[key] = text_obj
+        elif text_obj.text != text:
+            text_obj.text = text
+
+        text_obj.draw()
+
     def draw_menu(self):
         """Draw MENU screen. """
 
@@ -47,6 +144,8 @@ class Drawer:
                          arcade.color.WHITE, 20, anchor_x="left", anchor_y="top")
         arcade.draw_text("C. Simulation", 170, 200,
                          arcade.color.WHITE, 20, anchor_x="left", anchor_y="top")
+        arcade.draw_text("D. Replay best pilots", 170, 160,
+                         arcade.color.WHITE, 20, anchor_x="left", anchor_y="top")
 
     def draw_game_over(self, points):
         """Draw GAME OVER screen. """
@@ -63,12 +162,24 @@ class Drawer:
                          arcade.color.WHITE, 16, align="center", anchor_x="center", anchor_y="center")
 
     def draw_evo_state(self):
-        """Displays EVOLUTION screen when calculating new generation. """
+        """Displays EVOLUTION screen with progress of new generation calculated in background. """
 
         arcade.draw_rectangle_filled(int(SCREEN_WIDTH * 0.5), int(SCREEN_HEIGHT * 0.5), 700, 250, arcade.color.BLACK)
-        arcade.draw_text("Evolution", int(SCREEN_WIDTH * 0.5), int(SCREEN_HEIGHT * 0.5),
+        arcade.draw_text("Evolution", int(SCREEN_WIDTH * 0.5), int(SCREEN_HEIGHT * 0.5) + 30,
                          arcade.color.WHITE, 54, align="center", anchor_x="center", anchor_y="center")
 
+        # Progress bar of background evolution
+        bar_width = 400
+        arcade.draw_rectangle_outline(int(SCREEN_WIDTH * 0.5), int(SCREEN_HEIGHT * 0.5) - 40, bar_width, 16,
+                                      arcade.color.WHITE)
+        if self.evolution_progress > 0:
+            done_width = bar_width * self.evolution_progress
+            arcade.draw_rectangle_filled(int(SCREEN_WIDTH * 0.5) - 0.5 * (bar_width - done_width),
+                                         int(SCREEN_HEIGHT * 0.5) - 40, done_width, 16, arcade.color.WHITE)
+
+        self.draw_cached_text(f"next generation: {self.evolution_progress:.0%}  {self.evolution_step}",
+                              int(SCREEN_WIDTH * 0.5) - 200, int(SCREEN_HEIGHT * 0.5) - 80, arcade.color.WHITE, 13)
+
     def draw_sim_menu(self):
         """Displays SIMULATION menu on the screen. """
 
@@ -80,35 +191,44 @@ class Drawer:
         arcade.draw_text("2. Click ESC to leave to MAIN menu", 30, 220,
                          arcade.color.WHITE, 18, anchor_x="left", anchor_y="top")
 
+    def draw_profiler_overlay(self, stats):
+        """Displays per-phase timings (mean / p99 of last frames, see Profiler) in top left corner. """
+
+        arcade.draw_rectangle_filled(105, SCREEN_HEIGHT - 10 - 9 * len(stats), 210, 20 + 18 * len(stats),
+                                     arcade.color.BLACK)
+        for i, (phase, (mean, p99)) in enumerate(stats.items()):
+            self.draw_cached_text(f"{phase}: {mean:.2f} / {p99:.2f} ms", 10, SCREEN_HEIGHT - 22 - 18 * i,
+                                  arcade.color.WHITE, 11)
+
     def draw_bottom_bar(self, score, simulation_mode, gen_id, living_ships, gap_x1, gap_x2, pos_y):
         """Displays bottom info bar on the screen. """
 
         # Drawing bottom screen area with score and dist to closest obstacle
         arcade.draw_rectangle_filled(320, 15, 640, 30, arcade.color.BLACK)
         score_text = f"Score: {score}"
-        arcade.draw_text(score_text, 10, 10, arcade.color.WHITE, 13)
+        self.draw_cached_text(score_text, 10, 10, arcade.color.WHITE, 13)
 
         # Draws generation number and # of ships alive if in simulation mode
         if simulation_mode:
 
             gen_id = f"gen_id: {gen_id}"
-            arcade.draw_text(gen_id, 90, 10, arcade.color.WHITE, 13)
+            self.draw_cached_text(gen_id, 90, 10, arcade.color.WHITE, 13)
 
             live_ships = f"ships_alive: {living_ships}"
-            arcade.draw_text(live_ships, 180, 10, arcade.color.WHITE, 13)
+            self.draw_cached_text(live_ships, 180, 10, arcade.color.WHITE, 13)
 
-            arcade.draw_text("R to enter simulation MENU", 305, 10, arcade.color.WHITE, 13)
+            self.draw_cached_text("R to enter simulation MENU", 305, 10, arcade.color.WHITE, 13)
 
         # Draws coordinates and distance to closest obstacle if in single-player mode
         else:
             # Display x1 and x2 coordinates of gap in closest obstacle
             near_obs_x1 = f"gap_x1 = {round(gap_x1)}"
-            arcade.draw_text(near_obs_x1, 330, 10, arcade.color.WHITE, 13)
+            self.draw_cached_text(near_obs_x1, 330, 10, arcade.color.WHITE, 13)
 
             near_obs_x1 = f"gap_x2 = {round(gap_x2)}"
-            arcade.draw_text(near_obs_x1, 450, 10, arcade.color.WHITE, 13)
+            self.draw_cached_text(near_obs_x1, 450, 10, arcade.color.WHITE, 13)
 
             # Distance to closest objects (delta y)
             near_obs_y = f"Closest obstacle: delta_y = " \
                 f"{int(round(pos_y - 70, -1))}"
-            arcade.draw_text(near_obs_y, 90, 10, arcade.color.WHITE, 13)
+            self.draw_cached_text(near_obs_y, 90, 10, arcade.color.WHITE, 13)
@@ -0,0 +1,243 @@
+"""
+Event-driven simulation - obstacles' crossings of ships' line are precomputed, ships are checked only at crossings
+"""
+import numpy as np
+
+from settings import *
+from course import Course
+from game_classes import SHIP_MOVES
+
+
+OBSTACLE_THICKNESS = 20     # same as Obstacle.thickness
+SHIP_LINE_Y = 70            # closest obstacle is passed when it gets below this line (see ident_clos_obstacle)
+
+
+class CourseTimeline:
+    """
+    Obstacles of seeded course do not depend on ships - their positions follow from OBSTACLE_SPEED, OBSTACLE_FREQ
+    and level_up speed schedule. Timeline jumps from one pass of closest obstacle to the next one and returns ticks
+    (time steps) at which collision of ships with closest obstacle has to be checked.
+
+    Obstacle trajectories are computed with np.subtract.accumulate - the same sequence of float operations as
+    Obstacle.update, so ticks are exactly the same as in SimulationEngine.
+
+    Methods:
+        - trajectory - returns positions of obstacle after 0..n steps
+        - next_window - moves obstacles to next pass of closest obstacle, returns collision ticks and pass tick
+    """
+
+    def __init__(self, course_seed, center_y, delta_time=PHYSICS_DT):
+
+        self.course = Course(course_seed)
+        self.center_y = center_y
+        self.delta_time = delta_time
+
+        # State of obstacles at the start of tick (same as obstacle_list of SimulationEngine)
+        self.tick = 0
+        self.position_y = [float(SCREEN_HEIGHT + i * OBSTACLE_FREQ) for i in range(NO_OBSTACLES)]
+        self.gaps = [self.course.next_gap() for i in range(NO_OBSTACLES)]
+        self.closest = 0
+        self.score = 0
+        self.speed = OBSTACLE_SPEED
+
+    @staticmethod
+    def trajectory(position_y, step, n):
+        """Returns array of positions of obstacle after 0..n moves by step. """
+
+        return np.subtract.accumulate(np.concatenate(([position_y], np.full(n, step))))
+
+    def next_window(self):
+        """
+        Moves obstacles to the tick at which closest obstacle is passed (respawning obstacles below the screen) and
+        updates closest obstacle, score and speed.
+        Returns: list of collision checks (tick, gap_x1, gap_x2, bottom edge, score) and pass tick
+        """
+
+        step = self.speed * self.delta_time
+        position_y = self.position_y[self.closest]
+
+        # Positions of closest obstacle until it gets below ships' line (estimate of steps is extended if needed)
+        n = max(int((position_y - SHIP_LINE_Y) / step), 0) + 2
+        traj = self.trajectory(position_y, step, n)
+        while traj[-1] >= SHIP_LINE_Y:
+            traj = np.concatenate((traj, self.trajectory(traj[-1], step, n)[1:]))
+
+        # Only one obstacle is passed per tick - obstacle which became closest at this tick is passed later
+        first = 0 if self.tick == 0 else 1
+        k_pass = first + int(np.argmax(traj[first:] < SHIP_LINE_Y))
+
+        # Collisions are checked at ticks when bottom edge of closest obstacle is not above ships
+        bot_edge = traj[:k_pass + 1] - OBSTACLE_THICKNESS * 0.5
+        gap_x1, gap_x2 = self.gaps[self.closest]
+        collisions = [(self.tick + k, gap_x1, gap_x2, bot_edge[k], self.score)
+                      for k in range(first, k_pass + 1) if self.center_y >= bot_edge[k]]
+
+        # Move all obstacles to pass tick, obstacles below the screen are respawned (with gaps taken in game order)
+        respawns = []
+        for j in range(NO_OBSTACLES):
+            moved = 0
+            traj_j = self.trajectory(self.position_y[j], step, k_pass)
+            below = np.flatnonzero(traj_j[1:] < 0)
+            while below.size:
+                moved += below[0] + 1
+                respawns.append((moved, j))
+                traj_j = self.trajectory(SCREEN_HEIGHT + OBSTACLE_FREQ, step, k_pass - moved)
+                below = np.flatnonzero(traj_j[1:] < 0)
+            self.position_y[j] = float(traj_j[-1])
+
+        for moved, j in sorted(respawns):
+            self.gaps[j] = self.course.next_gap()
+
+        # Passing obstacle (+1 point, obstacles accelerate every 50 points)
+        self.tick += k_pass
+        self.closest = (self.closest + 1) % NO_OBSTACLES
+        self.score += 1
+        if self.score % 50 == 0:
+            self.speed += 50
+
+        return collisions, self.tick
+
+
+class EventSimulator:
+    """
+    Event-driven evaluation of generation. Collisions are checked only at ticks given by CourseTimeline instead of
+    every frame. Between them ships are moved frame by frame, but ship which did not move (it decided to stay or
+    is stuck at screen edge) keeps making the same decision until the gap changes, so it is settled - it makes no more
+    decisions and its decision counters are updated in one go. When all living ships are settled, simulation jumps
+    straight to the next event. Ships which keep moving are still decided every frame, so the gain depends on how many
+    ships settle - about 1.3-1.4x for 500 evolved pilots, none (slightly slower) for 2000 pilots or network [64, 64].
+
+    Results (scores, decision counters, fitness, number of steps) are the same as of SimulationEngine.step, also with
+    episode limits (max_episode_ticks, max_episode_score, 0 - no limit) - generation ends at the same tick as with
+    CollisionSystem.check_episode_end and living ships finish with its score.
+    Can be used as SimulationEngine's evaluator (same interface as ParallelEvaluator).
+
+    Methods:
+        - evaluate - plays one generation of population
+        - advance - moves living ships which are not settled up to given tick
+        - flush - updates decision counters of settled ships up to given tick
+        - close - does nothing (evaluator interface)
+    """
+
+    def __init__(self, delta_time=PHYSICS_DT, max_episode_ticks=MAX_EPISODE_TICKS, max_episode_score=MAX_EPISODE_SCORE):
+
+        self.delta_time = delta_time
+        self.max_episode_ticks = max_episode_ticks
+        self.max_episode_score = max_episode_score
+
+        self.population = None
+        self.tick = 0
+        self.gap = None
+
+        # Settled ships - tick since which their decisions are not counted yet and kind of decision (stay / move)
+        self.settled = None
+        self.settled_since = None
+        self.settled_stay = None
+
+    def evaluate(self, population, course_seed, skip_mask=None):
+        """
+        Plays one generation of population on obstacle course given by seed (except ships selected by optional
+        skip_mask). All ships are dead afterwards.
+        Returns: game score and number of steps
+        """
+
+        self.population = population
+        store = population.store
+
+        population.ressurect_ships()
+        if skip_mask is not None:
+            store.alive[skip_mask] = False
+
+        self.settled = np.zeros(population.size, dtype=bool)
+        self.settled_since = np.zeros(population.size, dtype=np.int64)
+        self.settled_stay = np.zeros(population.size, dtype=bool)
+
+        timeline = CourseTimeline(course_seed, store.center_y, self.delta_time)
+        self.tick = 0
+        self.gap = timeline.gaps[timeline.closest]
+
+        if population.check_if_all_dead():
+            return 0, 0
+
+        # Tick at which episode limits end generation (score budget is known when its obstacle is passed)
+        end = self.max_episode_ticks or None
+
+        while True:
+            collisions, pass_tick = timeline.next_window()
+
+            for tick, gap_x1, gap_x2, bot_edge, score in collisions:
+                if end is not None and tick > end:
+                    break
+
+                self.advance(tick)
+                self.flush(tick)
+
+                population.collide(gap_x1, gap_x2, bot_edge, score)
+                self.settled &= store.alive
+
+                if population.check_if_all_dead():
+                    return score, tick
+
+            # Generation ends in this window - before its obstacle is passed, living ships finish with score
+            if end is not None and end <= pass_tick:
+                self.advance(end)
+                self.flush(end)
+                population.finish_episode(timeline.score - 1)
+                return timeline.score - 1, end
+
+            # Gap of new closest obstacle - settled ships have to decide again
+            self.advance(pass_tick)
+            self.flush(pass_tick)
+            self.settled[:] = False
+            self.gap = timeline.gaps[timeline.closest]
+
+            # Score reaches budget with passed obstacle, generation ends at next tick
+            if self.max_episode_score and timeline.score >= self.max_episode_score:
+                end = pass_tick + 1 if end is None else min(end, pass_tick + 1)
+
+    def advance(self, tick):
+        """Moves living ships which are not settled (frame by frame) up to given tick. """
+
+        store = self.population.store
+        gap_x1, gap_x2 = self.gap
+
+        while self.tick < tick:
+            idx = np.flatnonzero(store.alive & ~self.settled)
+            if not idx.size:
+                self.tick = tick
+                break
+
+            decisions = self.population.brain.decide(store.position_x[idx], gap_x1, gap_x2, idx)
+
+            # Decisions bookkeeping
+            stay = decisions == 0
+            store.stay_decs_count[idx] += stay
+            store.move_decs_count[idx] += ~stay
+
+            # Movement (with collisions with screen edges), ships which did not move are settled
+            position_x = store.position_x[idx]
+            new_position_x = np.clip(position_x + SHIP_MOVES[decisions], store.half_width,
+                                     SCREEN_WIDTH - store.half_width)
+            store.position_x[idx] = new_position_x
+
+            still = idx[new_position_x == position_x]
+            self.settled[still] = True
+            self.settled_since[still] = self.tick + 1
+            self.settled_stay[still] = stay[new_position_x == position_x]
+
+            self.tick += 1
+
+    def flush(self, tick):
+        """Adds decisions made by settled ships until given tick to their decision counters. """
+
+        store = self.population.store
+        idx = np.flatnonzero(self.settled)
+        count = tick - self.settled_since[idx]
+        stay = self.settled_stay[idx]
+
+        store.stay_decs_count[idx] += count * stay
+        store.move_decs_count[idx] += count * ~stay
+        self.settled_since[idx] = tick
+
+    def close(self):
+        """Nothing to release (evaluator interface, see ParallelEvaluator.close). """
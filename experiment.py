@@ -0,0 +1,129 @@
+"""
+Experiment configuration - evolution and network parameters of one training run carried by object (defaults from
+settings.py), so runs with different parameters do not need edited settings
+"""
+import json
+import sys
+
+import numpy as np
+
+import settings
+
+
+class ExperimentConfig:
+    """
+    Parameters of one headless training run:
+        - population_size, mutation_prob, selection_rate, stay_frac - evolution parameters (see settings.py)
+        - hidden_layers - sizes of hidden layers of network ("neurons" in from_dict - one hidden layer)
+        - seed - seed of run's random generator (genes, evolution, obstacle courses)
+        - max_episode_ticks, max_episode_score, early_cutoff - episode limits (see SimulationEngine)
+
+    Evolution parameters and episode limits are passed to Population and SimulationEngine. Network architecture is read
+    by modules at import time (GENE_SHAPES, see ext_functions.py), so apply_architecture has to be called before game
+    modules are imported - runs with different architectures are played in separate processes (see sweep.py).
+
+    Methods:
+        - from_dict / to_dict - creates config from dictionary / returns its dictionary
+        - save / load - saves / loads config as JSON file
+        - replace - returns copy of config with some parameters changed
+        - apply_architecture - writes network architecture to settings module
+        - population - creates population with config's parameters
+        - engine - creates SimulationEngine with config's population and episode limits
+    """
+
+    FIELDS = ("population_size", "mutation_prob", "selection_rate", "stay_frac", "hidden_layers", "seed",
+              "max_episode_ticks", "max_episode_score", "early_cutoff")
+
+    def __init__(self, population_size=settings.POPULATION_SIZE, mutation_prob=settings.MUTATION_PROB,
+                 selection_rate=settings.SELECTION_RATE, stay_frac=settings.STAY_FRAC,
+                 hidden_layers=settings.HIDDEN_LAYERS, seed=settings.SEED,
+                 max_episode_ticks=settings.MAX_EPISODE_TICKS, max_episode_score=settings.MAX_EPISODE_SCORE,
+                 early_cutoff=settings.EARLY_CUTOFF):
+
+        if int(selection_rate * population_size) < 1:
+            raise ValueError(f"Selection rate {selection_rate} selects no pilots of population of {population_size}")
+
+        self.population_size = int(population_size)
+        self.mutation_prob = float(mutation_prob)
+        self.selection_rate = float(selection_rate)
+        self.stay_frac = float(stay_frac)
+        self.hidden_layers = [int(n) for n in hidden_layers]
+        self.seed = None if seed is None else int(seed)
+        self.max_episode_ticks = int(max_episode_ticks)
+        self.max_episode_score = int(max_episode_score)
+        self.early_cutoff = bool(early_cutoff)
+
+    def __repr__(self):
+        params = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"ExperimentConfig({params})"
+
+    @classmethod
+    def from_dict(cls, params):
+        """Creates config from dictionary of parameters (missing ones are taken from settings). """
+
+        params = dict(params)
+        if "neurons" in params:
+            params["hidden_layers"] = [params.pop("neurons")]
+
+        unknown = set(params) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown experiment parameters: {', '.join(sorted(unknown))}")
+
+        return cls(**params)
+
+    def to_dict(self):
+        """Returns dictionary of config's parameters. """
+
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def save(self, path):
+        """Saves config as JSON file. """
+
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Loads config saved with save. """
+
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def replace(self, **params):
+        """Returns copy of config with given parameters changed. """
+
+        return self.from_dict({**self.to_dict(), **params})
+
+    def apply_architecture(self):
+        """
+        Writes network architecture to settings module. Must be called before game modules are imported - raises
+        RuntimeError if they already were imported with different architecture.
+        """
+
+        ext_functions = sys.modules.get("ext_functions")
+        if ext_functions is not None and list(ext_functions.LAYER_SIZES[1:-1]) != self.hidden_layers:
+            raise RuntimeError(f"Network architecture {self.hidden_layers} has to be applied before game modules "
+                               f"are imported (imported with {list(ext_functions.LAYER_SIZES[1:-1])})")
+
+        settings.HIDDEN_LAYERS = list(self.hidden_layers)
+        settings.NEURONS = self.hidden_layers[0] if self.hidden_layers else 0
+
+    def population(self):
+        """Creates (and populates) population with config's parameters and random generator seeded with seed. """
+
+        from game_classes import Population
+
+        population = Population(size=self.population_size, rng=np.random.default_rng(self.seed),
+                                selection_rate=self.selection_rate, mutation_prob=self.mutation_prob,
+                                stay_frac=self.stay_frac)
+        population.populate()
+
+        return population
+
+    def engine(self, **kwargs):
+        """Creates SimulationEngine with config's population and episode limits (kwargs are passed to engine). """
+
+        from simulation_engine import SimulationEngine
+
+        return SimulationEngine(population=self.population(), max_episode_ticks=self.max_episode_ticks,
+                                max_episode_score=self.max_episode_score, early_cutoff=self.early_cutoff, **kwargs)
@@ -2,7 +2,6 @@
 Helper functions used in neural network implementation and evolving of population
 """
 import numpy as np
-import random as rd
 from settings import *
 
 
@@ -35,37 +34,123 @@ def add_score(x, stay_frac):
         return 0
 
 
-def cross_over(pilot_1, pilot_2):
+def add_score_array(x, stay_frac):
+    """Vectorized version of add_score - calculates additional score for numpy array of 'stay' fractions. """
+
+    x = np.asarray(x, dtype=float)
+    score = np.zeros(x.shape)
+
+    low = (0 < x) & (x <= stay_frac)
+    high = (stay_frac < x) & (x <= 1)
+    score[low] = (1/stay_frac) * x[low]
+    score[high] = -(1/(1-stay_frac)) * x[high] + 1/(1-stay_frac)
+
+    return score
+
+
+def cross_over(pilot_1, pilot_2, rng):
     """
     Cross genoms of two pilots to produce child genes using the following formula:
-    new = parent_1 * random + parent_2 * (1 - random), where random is number in range 0-1
+    new = parent_1 * random + parent_2 * (1 - random), where random is number in range 0-1 drawn from rng
+    Returns: tuple of child genes (weights of all layers, then biases of all layers, see GENE_SHAPES)
     """
 
     # --- Crossover ---
-    xoW = rd.random()  # Crossover weight
+    xoW = rng.random()  # Crossover weight
 
-    # Crossing genes of parents
-    gen_a_new = pilot_1.genotype_a * xoW + (1 - xoW) * pilot_2.genotype_a
-    gen_b_new = pilot_1.genotype_b * xoW + (1 - xoW) * pilot_2.genotype_b
-    bias_a_new = pilot_1.bias_a * xoW + (1 - xoW) * pilot_2.bias_a
-    bias_b_new = pilot_1.bias_b * xoW + (1 - xoW) * pilot_2.bias_b
+    # Crossing genes of parents (any number of layers)
+    return tuple(gene_1 * xoW + (1 - xoW) * gene_2 for gene_1, gene_2 in zip(pilot_1.genes, pilot_2.genes))
 
-    return gen_a_new, gen_b_new, bias_a_new, bias_b_new
 
-
-def mutate(gen_a_new, gen_b_new, bias_a_new, bias_b_new):
+def mutate(genes, rng, mutation_prob=MUTATION_PROB):
     """
-    Mutates genes by replacing with random numbers with probability of MUTATION_PROB (modified in settings.py)
+    Mutates genes by replacing with random numbers (drawn from rng) with probability of mutation_prob (MUTATION_PROB
+    modified in settings.py)
     """
 
-    mutation = rd.random()
+    mutation = rng.random()
     # Check if mutation happens
-    if mutation <= MUTATION_PROB:
+    if mutation <= mutation_prob:
+
+        # Replace whole genes with new random genes
+        genes = unflatten_genes(random_genomes(1, rng)[0])
+
+    return genes
+
+
+# Layer sizes of neural network: 3 inputs, hidden layers, 3 outputs
+LAYER_SIZES = (3, *HIDDEN_LAYERS, 3)
+LAYERS = len(LAYER_SIZES) - 1
+
+# Flat genome layout: weight matrices of all layers (outputs x inputs), then bias vectors of all layers (outputs x 1).
+# With one hidden layer: genotype_a (NEURONS x 3), genotype_b (3 x NEURONS), bias_a (NEURONS), bias_b (3)
+GENE_SHAPES = (tuple((n_out, n_in) for n_in, n_out in zip(LAYER_SIZES[:-1], LAYER_SIZES[1:])) +
+               tuple((n_out, 1) for n_out in LAYER_SIZES[1:]))
+GENE_BOUNDS = np.cumsum([0] + [rows * cols for rows, cols in GENE_SHAPES])
+GENOME_LEN = int(GENE_BOUNDS[-1])
+
+if BRAIN_DTYPE not in ("float32", "float16"):
+    raise ValueError(f"Unknown BRAIN_DTYPE: {BRAIN_DTYPE} (expected 'float32' or 'float16')")
+GENOME_DTYPE = np.dtype(BRAIN_DTYPE)
+
+# Scale of random genes - weights are drawn from N(0, 1), biases from N(0, 0.5)
+GENOME_SCALE = np.concatenate([np.full(rows * cols, 1 if i < LAYERS else 0.5) for i, (rows, cols)
+                               in enumerate(GENE_SHAPES)]).astype(np.float32)
+
+
+def flatten_genes(*genes):
+    """Concatenates genes of a pilot (weights, then biases, see GENE_SHAPES) into single flat genome vector of
+    GENOME_LEN elements. """
+
+    return np.concatenate([gene.ravel() for gene in genes]).astype(GENOME_DTYPE)
+
+
+def unflatten_genes(genome):
+    """Splits flat genome vector into genes of a pilot (weights, then biases), inverse of flatten_genes.
+    Returned arrays are views into genome. """
+
+    return tuple(genome[start:stop].reshape(shape)
+                 for start, stop, shape in zip(GENE_BOUNDS[:-1], GENE_BOUNDS[1:], GENE_SHAPES))
+
+
+def random_genomes(n, rng):
+    """Returns n randomly initialized genomes drawn from rng (numpy.random.Generator). """
+
+    # Drawn in float32 (generator has no float16 draws), so float32 genomes do not need a copy
+    genomes = rng.standard_normal((n, GENOME_LEN), dtype=np.float32)
+    genomes *= GENOME_SCALE
+
+    return genomes.astype(GENOME_DTYPE, copy=False)
+
+
+def cross_over_batch(genomes, parents_idx, out, rng):
+    """
+    Vectorized cross_over - fills every row of out with child of two parents randomly chosen from rows parents_idx
+    of genomes matrix: new = parent_1 * random + parent_2 * (1 - random), with separate random weight per child
+    """
+
+    children_num = len(out)
+    parents_1 = parents_idx[rng.integers(len(parents_idx), size=children_num)]
+    parents_2 = parents_idx[rng.integers(len(parents_idx), size=children_num)]
+    xoW = rng.random((children_num, 1), dtype=np.float32).astype(genomes.dtype, copy=False)  # Crossover weights
+
+    # parent_2 + random * (parent_1 - parent_2), computed in place
+    np.take(genomes, parents_1, axis=0, out=out)
+    out -= genomes[parents_2]
+    out *= xoW
+    out += genomes[parents_2]
+
+    return out
+
+
+def mutate_batch(genomes, rng, mutation_prob=MUTATION_PROB):
+    """
+    Vectorized mutate - replaces rows of genomes matrix with new random genomes with probability of mutation_prob.
+    Returns: number of mutated genomes
+    """
 
-        # Modify whole genes by multiplying their weights with mutation weight
-        gen_a_new = np.random.randn(NEURONS, 3)
-        gen_b_new = np.random.randn(3, NEURONS)
-        bias_a_new = np.random.randn(NEURONS, 1) * 0.5
-        bias_b_new = np.random.randn(3, 1) * 0.5
+    mutated = rng.random(len(genomes)) <= mutation_prob
+    mutated_num = int(np.count_nonzero(mutated))
+    genomes[mutated] = random_genomes(mutated_num, rng)
 
-    return gen_a_new, gen_b_new, bias_a_new, bias_b_new
+    return mutated_num
@@ -0,0 +1,67 @@
+"""
+Fitness cache - results of genomes already played on given obstacle course, so they are not simulated again
+"""
+import hashlib
+from collections import OrderedDict
+
+from settings import *
+
+
+class FitnessCache:
+    """
+    Bounded LRU cache of generation results keyed by (course seed, genome hash). Cached value is pilot's score and
+    numbers of 'stay' / 'move' decisions made during the generation - game on seeded course is deterministic,
+    so genome playing the same course again (e.g. survivor copied to next generation by evolve) gets the same result.
+
+    Methods:
+        - keys - returns cache keys for matrix of genomes
+        - get - returns cached result or None
+        - put - stores result, evicting least recently used entries above max_size
+        - count - updates hit / miss counters
+    """
+
+    def __init__(self, max_size=FITNESS_CACHE_SIZE):
+
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+        # Hit / miss counters - total and for the last generation
+        self.hits = 0
+        self.misses = 0
+        self.generation_hits = 0
+        self.generation_misses = 0
+
+    @staticmethod
+    def keys(genomes, course_seed):
+        """Returns list of cache keys, one for every genome (row) of genomes matrix. """
+
+        return [(course_seed, hashlib.blake2b(genome.tobytes(), digest_size=16).digest()) for genome in genomes]
+
+    def get(self, key):
+        """Returns cached (pilot_score, stay_decs, move_decs) for key or None. """
+
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+
+        return value
+
+    def put(self, key, value):
+        """Stores (pilot_score, stay_decs, move_decs) for key. """
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def count(self, hits, misses):
+        """Updates hit / miss counters with numbers for new generation. """
+
+        self.generation_hits = hits
+        self.generation_misses = misses
+        self.hits += hits
+        self.misses += misses
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,17 +1,23 @@
 """
  Game classes:
+    - ShipStore - array-backed state of ships (structure of arrays)
     - SpaceShip
     - Obstacle
     - Population - collection of Spaceships
     - Pilot - "brain" of SpaceShip, decides on what movement should be done by SpaceShip when in non-human player mode
 """
 
-import random as rd
+import os
 import arcade
 import numpy as np
 
 from settings import *
-from ext_functions import softmax, relu, cross_over, mutate, add_score
+from ext_functions import relu, add_score, add_score_array, unflatten_genes, \
+    random_genomes, cross_over_batch, mutate_batch, GENOME_LEN, GENOME_DTYPE, LAYERS
+from course import Course
+from brain import PopulationBrain
+from drawer import get_texture, SHIP_TEXTURE, SHIP_SCALE, OBSTACLE_TEXTURE
+from checkpoint import save_checkpoint, load_checkpoint
 
 
 # ------------------------------------------------------------------------------------------------------------------- #
@@ -20,123 +26,468 @@ class Population:
     Collection of SpaceShip objects, which together with their pilots will be evolving as playing
 
     Methods:
-        - populate - generates collection of POPULATION_SIZE ships
+        - populate - generates collection of size (POPULATION_SIZE by default) ships
         - erase_history - restars population by cleaning ships_list and performing fresh initialization
         - evolve - performs evolution algorithm steps: selection, crossover and mutation and reassigns Pilots genotypes
+        - start_generation - starts next generation (generation id and decision counters at its start)
         - ressurect_ships - resurrects all ships in population and reposition them to the middle of the screen
         - check_if_all_dead - returns TRUE if all ships are dead
         - evolve - performs population evolution
-        - selection - sorts pilots by their fitness
+        - selection - finds pilots with the best fitness
+        - selection_decided - checks if living pilots can no longer change membership of top ships
+        - finish_episode - ends episode of living pilots and calculates their fitness
+        - update_ships - makes decisions for all living ships at once and moves them
+        - decide_ships / move_ships - the two steps of update_ships
+        - collide - kills ships colliding with closest obstacle and calculates their fitness
+        - get_genomes - returns genes of all pilots as (size, GENOME_LEN) matrix
+        - set_genomes - assigns genes of all pilots from (size, GENOME_LEN) matrix
+        - save / load - saves / loads population checkpoint (see checkpoint.py)
+        - break_simulation - stops on current generation and saves its checkpoint
+        - emigrants / immigrate - exchange of best genomes between populations (see islands.py)
     """
 
-    def __init__(self):
+    def __init__(self, size=POPULATION_SIZE, rng=None, selection_rate=SELECTION_RATE, mutation_prob=MUTATION_PROB,
+                 stay_frac=STAY_FRAC):
 
         # Population parameters
+        self.size = size
+        self.rng = rng if rng is not None else np.random.default_rng()  # all random draws of evolution
+        self.selection_rate = selection_rate
+        self.mutation_prob = mutation_prob
+        self.stay_frac = stay_frac  # fraction of 'stay' decisions rewarded by fitness (see add_score)
         self.generation_id = 0
         self.all_dead = False
-        self.living_ships = POPULATION_SIZE
+        self.living_ships = size
+        self.mutations = 0  # number of genomes mutated by last evolution
+
+        # Decision counters at the start of current generation (survivors carry their counters over, see telemetry)
+        self.start_stay_decs_count = np.zeros(size, dtype=np.int64)
+        self.start_move_decs_count = np.zeros(size, dtype=np.int64)
+
+        # Array-backed state of all ships, ships in ships_list are views into it (created on access)
+        self.store = None
 
         # Population ship lists
         self.ships_list = []
-        self.prev_gen_ships_list = []
         self.top_ships = []
+        self.top_idx = np.arange(0)
+
+        # Batched neural networks of all pilots
+        self.brain = PopulationBrain()
 
     def populate(self):
         """Generate population with ships and randomly intialized brains/pilots. """
 
-        self.living_ships = POPULATION_SIZE
-        for i in range(POPULATION_SIZE):
-            self.ships_list.append(SpaceShip(320, 50, 0, 15))
+        self.living_ships = self.size
+        self.store = ShipStore(self.size, position_y=50, h_width=15, stay_frac=self.stay_frac)
+        self.ships_list = ShipViews(self.store)
+
+        # Random initialization of all brains at once
+        self.store.genomes[:] = random_genomes(self.size, self.rng)
+
+        self.brain.load(self.store.genomes)
+
+        # Counters of new store (also when population is erased while generation is played)
+        self.start_stay_decs_count = self.store.stay_decs_count.copy()
+        self.start_move_decs_count = self.store.move_decs_count.copy()
 
     def erase_history(self):
         """Restart population by cleaning ships_list and performing fresh initialization. """
 
         self.ships_list = []
-        self.prev_gen_ships_list = []
         self.top_ships = []
+        self.top_idx = np.arange(0)
         self.generation_id = 0
         self.populate()
 
+    def start_generation(self):
+        """Starts next generation - increments generation id and keeps decision counters of pilots at its start. """
+
+        self.generation_id += 1
+        self.start_stay_decs_count = self.store.stay_decs_count.copy()
+        self.start_move_decs_count = self.store.move_decs_count.copy()
+
     def ressurect_ships(self):
         """Resurrects all ships in population and reposition them to the middle of the screen. """
 
-        for ship in self.ships_list:
-            ship.alive = True
-            ship.position_x = int(SCREEN_WIDTH / 2)
+        self.store.alive[:] = True
+        self.store.position_x[:] = int(SCREEN_WIDTH / 2)
+        self.store.prev_position_x[:] = self.store.position_x
 
         self.all_dead = False
 
     def check_if_all_dead(self):
         """Checks if all ships are dead. """
 
-        alive_ships_num = 0
-        self.all_dead = True
-        for ship in self.ships_list:
-            if ship.alive:
-                self.all_dead = False
-                alive_ships_num += 1
+        self.living_ships = int(np.count_nonzero(self.store.alive))
+        self.all_dead = self.living_ships == 0
 
-        self.living_ships = alive_ships_num
         return self.all_dead
 
-    def evolve(self):
-        """Performs evolution algorithm steps: selection, crossover and mutation and reassigns Pilots' genotypes. """
+    def evolve(self, progress=None):
+        """
+        Performs evolution algorithm steps: selection, crossover and mutation and reassigns Pilots' genotypes.
+        progress (optional) is called with name of finished step and fraction of evolution done.
+        """
+
+        progress = progress if progress is not None else (lambda step, done: None)
 
         # --- Selection ---
         self.selection()
+        progress("selection", 0.25)
 
         # --- Evolution ---
-        # Top ships are survivors, they go to next generation
-        for i in range(int(SELECTION_RATE * POPULATION_SIZE)):
-            self.ships_list[i] = self.top_ships[i]
-
-        # Generate "children" for the next generation by crossing over randomly chosen parents from top_ships
-        for i in range(int(SELECTION_RATE * POPULATION_SIZE), POPULATION_SIZE):
+        # Next generation is built in preallocated buffer, which then becomes current genome matrix
+        store = self.store
+        top_num = len(self.top_idx)
+        next_genomes = store.next_genomes
 
-            new_gen_a, new_gen_b, new_bias_a, new_bias_b = cross_over(rd.choice(self.top_ships).pilot,
-                                                                      rd.choice(self.top_ships).pilot)
+        # Top ships are survivors, they go to next generation together with their stats
+        np.take(store.genomes, self.top_idx, axis=0, out=next_genomes[:top_num])
+        store.copy_rows(self.top_idx, np.arange(top_num))
+        progress("survivors", 0.4)
 
-            new_gen_a, new_gen_b, new_bias_a, new_bias_b = mutate(new_gen_a, new_gen_b, new_bias_a, new_bias_b)
+        # Generate "children" for the next generation by crossing over randomly chosen parents from top ships
+        cross_over_batch(store.genomes, self.top_idx, out=next_genomes[top_num:], rng=self.rng)
+        progress("crossover", 0.8)
+        self.mutations = mutate_batch(next_genomes[top_num:], rng=self.rng, mutation_prob=self.mutation_prob)
 
-            self.ships_list[i].pilot.genotype_a = new_gen_a
-            self.ships_list[i].pilot.genotype_b = new_gen_b
-            self.ships_list[i].pilot.bias_a = new_bias_a
-            self.ships_list[i].pilot.bias_b = new_bias_b
+        store.swap_genomes()
+        self.brain.load(store.genomes)
+        progress("mutation", 1.0)
 
     def selection(self):
-        """Sorts pilots by their fitness and assigns the best units to top_ships variable"""
+        """Finds pilots with the best fitness and assigns them (best first) to top_idx and top_ships variables. """
 
         # --- Selection ---
-        # Sort ships by their performance (measured by pilot's score)
-        self.prev_gen_ships_list = []
-        self.prev_gen_ships_list = self.ships_list[:]
-        self.prev_gen_ships_list.sort(key=lambda c: c.pilot.fitness, reverse=True)
+        # Only top scorers are needed, so instead of sorting whole population they are partitioned out first
+        top_num = int(self.selection_rate * self.size)
+        fitness = self.store.fitness
+        top_idx = np.argpartition(fitness, self.size - top_num)[self.size - top_num:]
 
-        # Assign best scorers to top_ships
-        self.top_ships = []
-        self.top_ships = self.prev_gen_ships_list[:int(SELECTION_RATE * POPULATION_SIZE)]
+        # Assign best scorers to top_idx / top_ships
+        self.top_idx = top_idx[np.argsort(-fitness[top_idx], kind="stable")]
+        self.top_ships = [self.ships_list[i] for i in self.top_idx]
+
+    def selection_decided(self, score):
+        """
+        Checks if membership of top ships (see selection) can no longer change while living ships play on. Living
+        ships will die with pilot score of at least current score (fitness >= score, add_score bonus is 0-1) and
+        fitness of dead ships is final, so selection is decided when all living ships fit in top ships and score
+        already beats fitness of every dead ship which would be pushed out of top ships by them.
+        """
+
+        top_num = int(self.selection_rate * self.size)
+        alive = self.store.alive
+        living = int(np.count_nonzero(alive))
+        if living == 0 or living > top_num:
+            return False
+
+        # Dead ships taking the remaining places in top ships, the best dead ship left out must be beaten
+        dead_fitness = self.store.fitness[~alive]
+        rest = top_num - living
+        if rest >= len(dead_fitness):
+            return True
+
+        return score > np.partition(dead_fitness, len(dead_fitness) - rest - 1)[len(dead_fitness) - rest - 1]
+
+    def finish_episode(self, score):
+        """Ends episode of living pilots - they get pilot score for current score and their fitness is calculated. """
+
+        living = self.store.alive.copy()
+        self.store.pilot_score[living] = score
+        self.store.calc_fitness(living)
+        self.store.alive[:] = False
+        self.check_if_all_dead()
+
+    def update_ships(self, ai_state, gap_x1, gap_x2):
+        """Updates all living ships. In AI mode decisions of all pilots are made with one batched brain pass. """
+
+        living_idx, decisions = self.decide_ships(ai_state, gap_x1, gap_x2)
+        self.move_ships(living_idx, decisions)
+
+    def decide_ships(self, ai_state, gap_x1, gap_x2):
+        """
+        Makes decisions of all living pilots (with decisions bookkeeping).
+        Returns: indices of living ships and their decisions (None if not in AI mode)
+        """
+
+        store = self.store
+        living_idx = np.flatnonzero(store.alive)
+        if not ai_state or not living_idx.size:
+            return living_idx, None
+
+        decisions = self.brain.decide(store.position_x[living_idx], gap_x1, gap_x2, living_idx)
+
+        # Decisions bookkeeping
+        stay = decisions == 0
+        store.stay_decs_count[living_idx] += stay
+        store.move_decs_count[living_idx] += ~stay
+
+        return living_idx, decisions
+
+    def move_ships(self, living_idx, decisions):
+        """Moves living ships according to decisions (or by change_x if decisions is None). """
+
+        store = self.store
+        store.prev_position_x[:] = store.position_x
+        if not living_idx.size:
+            return
+
+        if decisions is not None:
+            # Movement: 0 - STAY, 1 - LEFT, 2 - RIGHT
+            store.position_x[living_idx] += SHIP_MOVES[decisions]
+        else:
+            store.position_x[living_idx] += store.change_x[living_idx]
+
+        # Collisions with screen edges
+        np.clip(store.position_x, store.half_width, SCREEN_WIDTH - store.half_width, out=store.position_x)
+
+    def get_genomes(self):
+        """Returns genes of all pilots as matrix - one flat genome (see flatten_genes) per row. """
+
+        return self.store.genomes
+
+    def set_genomes(self, genomes):
+        """Assigns genes of all pilots from matrix with one flat genome per row. """
+
+        self.store.genomes[:] = genomes
+        self.brain.load(self.store.genomes)
+
+    def emigrants(self, n):
+        """Returns copy of genomes of n pilots with the best fitness (best first). """
+
+        best_idx = np.argsort(-self.store.fitness, kind="stable")[:n]
+        return self.store.genomes[best_idx].copy()
+
+    def immigrate(self, genomes):
+        """
+        Replaces genomes of the last pilots (children made by last evolve, survivors at the top stay) with immigrant
+        genomes. Their decision counters are reset.
+        """
+
+        n = len(genomes)
+        self.store.genomes[self.size - n:] = genomes
+        self.store.stay_decs_count[self.size - n:] = 0
+        self.store.move_decs_count[self.size - n:] = 0
+        self.brain.load(self.store.genomes)
+
+    def save(self, path):
+        """Saves checkpoint of population (genomes, fitness, pilots' stats, generation id, RNG state). """
+
+        save_checkpoint(self, path)
+
+    def load(self, path):
+        """Loads population checkpoint saved with save. """
+
+        load_checkpoint(self, path)
+
+    def break_simulation(self, score):
+        """
+        Stops simulation on current generation - living pilots get their fitness for current score - and saves
+        population checkpoint (best pilot included). Returns path of checkpoint file.
+        """
+
+        living = self.store.alive.copy()
+        self.store.pilot_score[living] = score
+        self.store.calc_fitness(living)
+
+        path = os.path.join(CHECKPOINT_DIR, f"break_gen_{self.generation_id:06d}_score_{score}.npz")
+        self.save(path)
+
+        return path
+
+    def collide(self, gap_x1, gap_x2, obst_bot_edge, score):
+        """Kills all living ships colliding with obstacle (given by its gap and bottom edge) and calculates fitness. """
+
+        store = self.store
+        if store.center_y < obst_bot_edge:
+            return
+
+        x = store.position_x
+        hit = store.alive & (((0 <= x) & (x <= gap_x1)) | ((gap_x2 <= x) & (x <= SCREEN_WIDTH)))
+
+        store.alive[hit] = False
+        store.pilot_score[hit] = score
+        store.calc_fitness(hit)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+# Position change for each decision: 0 - STAY, 1 - LEFT, 2 - RIGHT
+SHIP_MOVES = np.array([0, -MOVEMENT_SPEED, MOVEMENT_SPEED])
+
+
+class ShipStore:
+    """
+    Array-backed state of ships (structure of arrays). Row i holds state of ship with index i, SpaceShip and Pilot
+    objects are thin views into single row.
+
+    Methods:
+        - single - creates store of single ship with random genes
+        - swap_genomes - swaps current genome matrix with next generation buffer
+        - copy_rows - copies state of ships between rows
+        - calc_fitness - calculates fitness of selected pilots (same formula as Pilot.calc_fitness)
+    """
+
+    def __init__(self, size, position_y=50, h_width=15, stay_frac=STAY_FRAC):
+
+        # Geometrical params (all ships fly at the same height and have the same size)
+        self.half_width = h_width
+        self.center_y = position_y + 20
+        self.position_x = np.full(size, int(SCREEN_WIDTH / 2), dtype=np.int64)
+        self.prev_position_x = self.position_x.copy()  # position before last step (interpolated rendering)
+        self.change_x = np.zeros(size, dtype=np.int64)
+
+        # In-game params
+        self.alive = np.ones(size, dtype=bool)
+
+        # Pilot attributes (stay_frac - fraction of 'stay' decisions rewarded by fitness)
+        self.stay_frac = stay_frac
+        self.pilot_score = np.zeros(size, dtype=np.int64)
+        self.fitness = np.zeros(size)
+        self.stay_decs_count = np.zeros(size, dtype=np.int64)
+        self.move_decs_count = np.zeros(size, dtype=np.int64)
+
+        # Genes of pilots (one flat genome per row) and preallocated buffer for the next generation
+        self.genomes = np.zeros((size, GENOME_LEN), dtype=GENOME_DTYPE)
+        self.next_genomes = np.zeros((size, GENOME_LEN), dtype=GENOME_DTYPE)
+
+    @classmethod
+    def single(cls, position_y=50, h_width=15, rng=None):
+        """Returns store of single ship with randomly initialized genes (drawn from rng). """
+
+        store = cls(1, position_y, h_width)
+
+        # Random initialization of weights and biases of neural network
+        rng = rng if rng is not None else np.random.default_rng()
+        store.genomes[:] = random_genomes(1, rng)
+
+        return store
+
+    def swap_genomes(self):
+        """Makes next generation buffer current genome matrix (previous one becomes the buffer). """
+
+        self.genomes, self.next_genomes = self.next_genomes, self.genomes
+
+    def copy_rows(self, src, dst):
+        """Copies pilot attributes from rows src to rows dst. """
+
+        for arr in (self.pilot_score, self.fitness, self.stay_decs_count, self.move_decs_count):
+            arr[dst] = arr[src]
+
+    def calc_fitness(self, mask):
+        """Calculates fitness of pilots selected by mask, see Pilot.calc_fitness. """
+
+        score = self.pilot_score[mask]
+        stay = self.stay_decs_count[mask]
+        decs = stay + self.move_decs_count[mask]
+
+        # Relative part of stay decisions
+        moves_distr_score = np.divide(stay, decs, out=np.zeros(len(score)), where=(score > 3) & (decs > 0))
+
+        self.fitness[mask] = score + add_score_array(moves_distr_score, self.stay_frac)
+
+
+# ------------------------------------------------------------------------------------------------------------------- #
+class ShipViews:
+    """
+    Sequence of SpaceShip views into rows of ShipStore - ship objects are created only when accessed, so population
+    holds no per-ship Python objects.
+    """
+
+    __slots__ = ("store",)
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store.alive)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ship index out of range")
+
+        return SpaceShip.view(self.store, int(index))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
 
 
 # ------------------------------------------------------------------------------------------------------------------- #
 class Pilot:
     """Pilot (or brain) for SpaceShip class. Its genes store information on weights for nerual network that
-    make a decision on next movement of the ship. """
-    def __init__(self):
+    make a decision on next movement of the ship. Genes and pilot attributes (score, fitness, decision counters) are
+    stored in ShipStore row given by index. Pilots of population are initialized by Population.populate, single
+    pilot with its own store is initialized with random genes drawn from rng. """
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store=None, index=0, rng=None):
+
+        self.store = store if store is not None else ShipStore.single(rng=rng)
+        self.index = index
+
+    @property
+    def genes(self):
+        """Views (weights of all layers, then biases of all layers) into pilot's row of genome matrix. """
+        return unflatten_genes(self.store.genomes[self.index])
+
+    @property
+    def weights(self):
+        """Weight matrices (outputs x inputs) of all layers of neural network. """
+        return self.genes[:LAYERS]
+
+    @property
+    def biases(self):
+        """Bias vectors (outputs x 1) of all layers of neural network. """
+        return self.genes[LAYERS:]
 
-        # Random initialization of weights for neural network using two arrays:
-        # Layer 1
-        self.genotype_a = np.random.randn(NEURONS, 3)
-        self.bias_a = np.random.randn(NEURONS, 1) * 0.5
+    @property
+    def pilot_score(self):
+        return int(self.store.pilot_score[self.index])
 
-        # Layer 2
-        self.genotype_b = np.random.randn(3, NEURONS)
-        self.bias_b = np.random.randn(3, 1) * 0.5
+    @pilot_score.setter
+    def pilot_score(self, value):
+        self.store.pilot_score[self.index] = value
 
-        # Pilot attributes
-        self.pilot_score = 0
-        self.fitness = 0
-        self.stay_decs_count = 0
-        self.move_decs_count = 0
+    @property
+    def fitness(self):
+        return float(self.store.fitness[self.index])
+
+    @fitness.setter
+    def fitness(self, value):
+        self.store.fitness[self.index] = value
+
+    @property
+    def stay_decs_count(self):
+        return int(self.store.stay_decs_count[self.index])
+
+    @stay_decs_count.setter
+    def stay_decs_count(self, value):
+        self.store.stay_decs_count[self.index] = value
+
+    @property
+    def move_decs_count(self):
+        return int(self.store.move_decs_count[self.index])
+
+    @move_decs_count.setter
+    def move_decs_count(self, value):
+        self.store.move_decs_count[self.index] = value
+
+    def get_genome(self):
+        """Returns genes of the pilot as single flat vector. """
+
+        return self.store.genomes[self.index].copy()
+
+    def set_genome(self, genome):
+        """Assigns genes of the pilot from single flat vector. """
+
+        self.store.genomes[self.index] = genome
 
     def decide(self, x_ship, gap_x1, gap_x2):
         """
@@ -145,16 +496,23 @@ class Pilot:
             Input: x coordinates of the ship and closest obstacle (x_ship, gap_x1, gap_x2)
             Structure of NN:
             - 3 input values
-            - 1 hidden layer with n neurons (n -> see NEURONS var in settings)
+            - hidden layers with n neurons each (n -> see HIDDEN_LAYERS var in settings)
             - 3 output values
             Output: 0 - STAY, 1 - LEFT, 2 - RIGHT
         """
 
-        input_lay = np.array((x_ship, gap_x1, gap_x2)).reshape(3, 1) / SCREEN_WIDTH
-        hid_lay = relu(np.dot(self.genotype_a, input_lay) + self.bias_a)
-        output = softmax(relu(np.dot(self.genotype_b, hid_lay) + self.bias_b))
+        layer = np.array((x_ship, gap_x1, gap_x2)).reshape(3, 1) / SCREEN_WIDTH
+        for weights, bias in zip(self.weights, self.biases):
+            layer = relu(np.dot(weights, layer) + bias)
 
-        decision = np.argmax(output)
+        # Softmax does not change order of outputs, so argmax of relu outputs is the decision
+        decision = np.argmax(layer)
+        self.count_decision(decision)
+
+        return decision
+
+    def count_decision(self, decision):
+        """Updates 'stay' and 'move' decisions counters. """
 
         if decision == 0:
             self.stay_decs_count += 1
@@ -163,8 +521,6 @@ class Pilot:
         elif decision == 2:
             self.move_decs_count += 1
 
-        return decision
-
     def calc_fitness(self):
         """
         - Calculates pilot's fitness based on his current score and proportion of 'stay' decisions to total decisions.
@@ -178,20 +534,27 @@ class Pilot:
         else:
             moves_distr_score = 0
 
-        self.fitness = self.pilot_score + add_score(moves_distr_score, STAY_FRAC)
+        self.fitness = self.pilot_score + add_score(moves_distr_score, self.store.stay_frac)
 
 
 # ------------------------------------------------------------------------------------------------------------------- #
 class SpaceShip:
     """
-    Spaceship game class.
+    Spaceship game class. Position and state are kept in ShipStore row given by index - in simulation mode all ships
+    of population share one store, single ship gets its own store.
 
     Methods:
         - draw - draws the spaceship
         - update - updates current state of spaceship e.g. position
+        - view - returns ship object for existing ShipStore row (row is not modified)
     """
 
-    def __init__(self, position_x, position_y, change_x, h_width):
+    __slots__ = ("store", "index", "position_y", "half_width", "center_y", "pilot")
+
+    def __init__(self, position_x, position_y, change_x, h_width, store=None, index=0, rng=None):
+
+        self.store = store if store is not None else ShipStore.single(position_y, h_width, rng)
+        self.index = index
 
         # Geometrical params
         self.position_x = position_x
@@ -202,32 +565,81 @@ class SpaceShip:
 
         # In-game params
         self.alive = True
-        self.pilot = Pilot()
+        self.pilot = Pilot(self.store, index)
+
+    @classmethod
+    def view(cls, store, index):
+        """Returns ship object viewing row index of store (position and state are taken from the row). """
+
+        ship = cls.__new__(cls)
+        ship.store = store
+        ship.index = index
+        ship.half_width = store.half_width
+        ship.center_y = store.center_y
+        ship.position_y = store.center_y - 20
+        ship.pilot = Pilot(store, index)
 
-    def draw(self):
-        """Draws the spaceship. """
+        return ship
+
+    @property
+    def position_x(self):
+        return int(self.store.position_x[self.index])
+
+    @position_x.setter
+    def position_x(self, value):
+        self.store.position_x[self.index] = value
+
+    @property
+    def change_x(self):
+        return int(self.store.change_x[self.index])
+
+    @change_x.setter
+    def change_x(self, value):
+        self.store.change_x[self.index] = value
+
+    @property
+    def alive(self):
+        return bool(self.store.alive[self.index])
+
+    @alive.setter
+    def alive(self, value):
+        self.store.alive[self.index] = value
+
+    def draw(self, alpha=1.0):
+        """Draws the spaceship. alpha - fraction of time step passed since last update (interpolated position). """
 
         if self.alive:
 
-            arcade.draw_point(self.position_x, self.position_y + 20, arcade.color.BLACK, 5)
+            prev_x = self.store.prev_position_x[self.index]
+            position_x = prev_x + alpha * (self.position_x - prev_x)
 
-            texture = arcade.load_texture("images/spaceShips_008.png")
-            scale = .5
+            arcade.draw_point(position_x, self.position_y + 20, arcade.color.BLACK, 5)
 
-            arcade.draw_texture_rectangle(self.position_x, self.position_y + 20,
+            texture = get_texture(SHIP_TEXTURE)
+            scale = SHIP_SCALE
+
+            arcade.draw_texture_rectangle(position_x, self.position_y + 20,
                                           scale * texture.width, scale * texture.height,
                                           texture, 0)
 
-    def update(self, ai_state, gap_x1, gap_x2):
-        """Updates current status of spaceship. """
+    def update(self, ai_state, gap_x1, gap_x2, decision=None):
+        """
+        Updates current status of spaceship.
+        decision - decision already made for this ship (e.g. by PopulationBrain), pilot decides itself if None
+        """
+
+        self.store.prev_position_x[self.index] = self.position_x
 
         # --- MOVEMENT ---
         # If non-human player decides on next movement
         # Rules applied: 0 - STAY, 1 - LEFT, 2 - RIGHT
         if ai_state:
-            if self.pilot.decide(self.position_x, gap_x1, gap_x2) == 0:
+            if decision is None:
+                decision = self.pilot.decide(self.position_x, gap_x1, gap_x2)
+
+            if decision == 0:
                 self.position_x += 0
-            elif self.pilot.decide(self.position_x, gap_x1, gap_x2) == 1:
+            elif decision == 1:
                 self.position_x += - MOVEMENT_SPEED
             else:
                 self.position_x += MOVEMENT_SPEED
@@ -254,49 +666,55 @@ class Obstacle:
     - respawn - respawn obstacle "above" the visibile screen area after passing by the spaceship y position
     - update - updates current state of obstacle (moves obstacle down the screen)
     - level_up - increase obstacle vertical movement every x points
+
+    Gaps of obstacles are taken from course (see Course) - obstacles sharing one course follow its gap sequence.
     """
-    def __init__(self, position_y):
+    def __init__(self, position_y, course=None):
 
         # --- GAP generation ---
-        # left edge x_position random generation:
-        self.gap_x1 = rd.randrange(0, 440, 1)
-        # right edge x_position random generation to be between 100 to 200 pixels from left x_position
-        self.gap_x2 = rd.randrange(self.gap_x1 + 100, self.gap_x1 + 200, 1)
+        # left edge x_position from 0 to 440, right edge 100 to 200 pixels from left x_position
+        self.course = course if course is not None else Course()
+        self.gap_x1, self.gap_x2 = self.course.next_gap()
         self.position_y = position_y
+        self.prev_position_y = position_y  # position before last update (interpolated rendering)
         self.thickness = 20
         self.color = arcade.color.ANTI_FLASH_WHITE
         self.is_active = True
         self.is_textured = True
         self.speed = OBSTACLE_SPEED
 
-    def draw(self):
-        """Draw space obstacle. """
+    def draw(self, alpha=1.0):
+        """Draw space obstacle. alpha - fraction of time step passed since last update (interpolated position). """
+
+        position_y = self.render_y(alpha)
 
         # --- TEXTURED RECTANGLE ---
         if self.is_textured:
-            obstacle_texture = arcade.load_texture("images/spaceBuilding_016.png")
+            obstacle_texture = get_texture(OBSTACLE_TEXTURE)
 
-            arcade.draw_texture_rectangle(0.5 * self.gap_x1, self.position_y,
+            arcade.draw_texture_rectangle(0.5 * self.gap_x1, position_y,
                                           self.gap_x1, self.thickness,
                                           obstacle_texture)
 
-            arcade.draw_texture_rectangle(0.5 * (SCREEN_WIDTH + self.gap_x2), self.position_y,
+            arcade.draw_texture_rectangle(0.5 * (SCREEN_WIDTH + self.gap_x2), position_y,
                                           SCREEN_WIDTH - self.gap_x2, self.thickness,
                                           obstacle_texture)
 
         # --- WHITE RECTANGLE ---
         else:
-            arcade.draw_rectangle_filled(0.5 * self.gap_x1, self.position_y,
+            arcade.draw_rectangle_filled(0.5 * self.gap_x1, position_y,
                                          self.gap_x1, self.thickness,
                                          self.color)
 
-            arcade.draw_rectangle_filled(0.5 * (SCREEN_WIDTH + self.gap_x2), self.position_y,
+            arcade.draw_rectangle_filled(0.5 * (SCREEN_WIDTH + self.gap_x2), position_y,
                                          SCREEN_WIDTH - self.gap_x2, self.thickness,
                                          self.color)
 
     def update(self, delta_time):
         """Move obstacle downwards. """
 
+        self.prev_position_y = self.position_y
+
         # Move the obstacle
         if self.is_active:
             self.position_y -= self.speed * delta_time
@@ -308,9 +726,14 @@ class Obstacle:
     def respawn(self):
         """Respawn obstacle after going out of the screen. """
 
-        self.gap_x1 = rd.randrange(0, 440, 1)
-        self.gap_x2 = rd.randrange(self.gap_x1 + 100, self.gap_x1 + 200, 1)
+        self.gap_x1, self.gap_x2 = self.course.next_gap()
         self.position_y = SCREEN_HEIGHT + OBSTACLE_FREQ
+        self.prev_position_y = self.position_y
+
+    def render_y(self, alpha):
+        """Returns y position interpolated between previous and current update (alpha from 0 to 1). """
+
+        return self.prev_position_y + alpha * (self.position_y - self.prev_position_y)
 
     def level_up(self, score):
         """Accelerate every 100 points"""
@@ -0,0 +1,281 @@
+"""
+--- SpaceAI island model ---
+
+N independent populations (islands), each with its own selection rate and mutation probability, evolve in separate
+processes. Every K generations each island sends copies of its best genomes to the next island in the ring, which
+replace its weakest children. Coordinator (main process) tracks the global best pilot and writes checkpoints.
+
+Usage:
+    python -m islands --islands 4 --generations 200
+    python -m islands --islands 4 --generations 200 --resume checkpoints/islands
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import traceback
+
+import numpy as np
+
+from settings import *
+from game_classes import Population
+from simulation_engine import SimulationEngine
+from event_simulator import EventSimulator
+from fused_kernel import FusedEvaluator
+from checkpoint import population_state, write_checkpoint
+
+
+def _run_island(island_id, params, generations, inbox, neighbour_inbox, reports):
+    """
+    Evolves one island for given number of generations (worker process). Sends report of every generation to
+    coordinator, emigrants to neighbour's inbox and takes immigrants from own inbox every migrate_every generations.
+    """
+
+    try:
+        population = Population(size=params["size"], rng=np.random.default_rng(params["seed"]),
+                                selection_rate=params["selection_rate"], mutation_prob=params["mutation_prob"])
+        population.populate()
+
+        engine = SimulationEngine(delta_time=params["delta_time"], population=population,
+                                  max_episode_ticks=params["max_episode_ticks"],
+                                  max_episode_score=params["max_episode_score"], early_cutoff=False)
+        if params["event_driven"]:
+            engine.evaluator = EventSimulator(params["delta_time"], params["max_episode_ticks"],
+                                              params["max_episode_score"])
+        elif params["fused"]:
+            engine.evaluator = FusedEvaluator(params["delta_time"], max_episode_ticks=params["max_episode_ticks"],
+                                              max_episode_score=params["max_episode_score"])
+
+        # Checkpoint holds played generation, so island resumes with its evolution
+        if params["resume"]:
+            population.load(params["resume"])
+            population.evolve()
+
+        for i in range(generations):
+            engine.run_generation()
+
+            store = population.store
+            best = int(np.argmax(store.fitness))
+            checkpoint_every = params["checkpoint_every"]
+            reports.put({
+                "island": island_id,
+                "generation_id": population.generation_id,
+                "score": engine.score,
+                "best_fitness": float(store.fitness[best]),
+                "mean_fitness": float(store.fitness.mean()),
+                "best_genome": store.genomes[best].copy(),
+                "state": (population_state(population)
+                          if checkpoint_every and population.generation_id % checkpoint_every == 0 else None),
+            })
+
+            migration = (params["migrate_every"] and population.generation_id % params["migrate_every"] == 0
+                         and i < generations - 1)
+            if migration:
+                neighbour_inbox.put(population.emigrants(params["migrants"]))
+
+            population.evolve()
+
+            if migration:
+                population.immigrate(inbox.get())
+
+        reports.put({"island": island_id, "done": True})
+
+    except Exception:
+        reports.put({"island": island_id, "error": traceback.format_exc()})
+
+
+class IslandModel:
+    """
+    Coordinator of island model - starts one process per island (ring of multiprocessing queues for migration) and
+    collects reports of their generations. Keeps the global best pilot (genome, fitness, island, generation) and
+    writes checkpoints: state of every island to island_<i>/ and global best to best.npz in checkpoint directory.
+
+    Islands get parameters from selection_rates / mutation_probs (cycled if shorter than number of islands) and
+    random generators spawned from seed, so the same seed gives the same run.
+
+    Methods:
+        - island_params - returns parameters of every island
+        - run - evolves all islands for given number of generations
+        - on_report - updates global best and writes checkpoints from island's report
+        - close_processes - terminates island processes
+    """
+
+    def __init__(self, islands=ISLANDS, population_size=POPULATION_SIZE, seed=SEED,
+                 selection_rates=ISLAND_SELECTION_RATES, mutation_probs=ISLAND_MUTATION_PROBS,
+                 migrate_every=MIGRATION_EVERY, migrants=MIGRANTS, delta_time=PHYSICS_DT, event_driven=False,
+                 fused=False, checkpoint_dir=os.path.join(CHECKPOINT_DIR, "islands"), checkpoint_every=CHECKPOINT_EVERY,
+                 resume=None, max_episode_ticks=MAX_EPISODE_TICKS, max_episode_score=MAX_EPISODE_SCORE):
+
+        if migrants > population_size * (1 - max(selection_rates)):
+            raise ValueError(f"Too many migrants ({migrants}) for population of {population_size} ships")
+
+        self.islands = islands
+        self.population_size = population_size
+        self.seed = seed
+        self.selection_rates = selection_rates
+        self.mutation_probs = mutation_probs
+        self.migrate_every = migrate_every
+        self.migrants = migrants
+        self.delta_time = delta_time
+        self.event_driven = event_driven
+        self.fused = fused
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        self.resume = resume
+        self.max_episode_ticks = max_episode_ticks
+        self.max_episode_score = max_episode_score
+
+        # Global best pilot
+        self.best_fitness = -np.inf
+        self.best_genome = None
+        self.best_island = None
+        self.best_generation = None
+
+        self.evaluations = 0
+        self.processes = []
+
+    def island_params(self):
+        """Returns list of parameters of every island. """
+
+        seeds = np.random.SeedSequence(self.seed).spawn(self.islands)
+
+        return [{
+            "size": self.population_size,
+            "seed": seeds[i],
+            "selection_rate": self.selection_rates[i % len(self.selection_rates)],
+            "mutation_prob": self.mutation_probs[i % len(self.mutation_probs)],
+            "migrate_every": self.migrate_every,
+            "migrants": self.migrants,
+            "delta_time": self.delta_time,
+            "event_driven": self.event_driven,
+            "fused": self.fused,
+            "max_episode_ticks": self.max_episode_ticks,
+            "max_episode_score": self.max_episode_score,
+            "checkpoint_every": self.checkpoint_every,
+            "resume": os.path.join(self.resume, f"island_{i}", "latest.npz") if self.resume else None,
+        } for i in range(self.islands)]
+
+    def run(self, generations, callback=None):
+        """
+        Evolves all islands for given number of generations. callback (optional) is called with every island's
+        report (dictionary with island, generation_id, score, best_fitness and mean_fitness).
+        """
+
+        inboxes = [multiprocessing.Queue() for i in range(self.islands)]
+        reports = multiprocessing.Queue()
+
+        self.processes = [multiprocessing.Process(target=_run_island, daemon=True,
+                                                  args=(i, params, generations, inboxes[i],
+                                                        inboxes[(i + 1) % self.islands], reports))
+                          for i, params in enumerate(self.island_params())]
+        for process in self.processes:
+            process.start()
+
+        try:
+            done = 0
+            while done < self.islands:
+                report = reports.get()
+
+                if "error" in report:
+                    raise RuntimeError(f"Island {report['island']} failed:\n{report['error']}")
+
+                if report.get("done"):
+                    done += 1
+                    continue
+
+                self.on_report(report)
+                if callback is not None:
+                    callback(report)
+
+            for process in self.processes:
+                process.join()
+
+        finally:
+            self.close_processes()
+
+    def on_report(self, report):
+        """Updates global best pilot and writes checkpoints from island's report. """
+
+        self.evaluations += self.population_size
+
+        if report["state"] is not None:
+            write_checkpoint(report["state"], os.path.join(self.checkpoint_dir, f"island_{report['island']}",
+                                                           "latest.npz"))
+
+        if report["best_fitness"] > self.best_fitness:
+            self.best_fitness = report["best_fitness"]
+            self.best_genome = report["best_genome"]
+            self.best_island = report["island"]
+            self.best_generation = report["generation_id"]
+
+            if self.checkpoint_every:
+                write_checkpoint({"genome": self.best_genome, "fitness": np.array(self.best_fitness),
+                                  "island": np.array(self.best_island),
+                                  "generation_id": np.array(self.best_generation)},
+                                 os.path.join(self.checkpoint_dir, "best.npz"))
+
+    def close_processes(self):
+        """Terminates island processes which are still running. """
+
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+
+def parse_args(args=None):
+    """Parses command line arguments. """
+
+    parser = argparse.ArgumentParser(description="spaceAI island model - populations evolved in parallel processes")
+    parser.add_argument("--islands", type=int, default=ISLANDS, help="number of islands (processes)")
+    parser.add_argument("--generations", type=int, default=100, help="number of generations of every island")
+    parser.add_argument("--population-size", type=int, default=POPULATION_SIZE, help="number of ships per island")
+    parser.add_argument("--seed", type=int, default=SEED, help="seed of random generators (same seed - same run)")
+    parser.add_argument("--selection-rates", type=float, nargs="+", default=ISLAND_SELECTION_RATES,
+                        help="selection rates of islands (cycled)")
+    parser.add_argument("--mutation-probs", type=float, nargs="+", default=ISLAND_MUTATION_PROBS,
+                        help="mutation probabilities of islands (cycled)")
+    parser.add_argument("--migrate-every", type=int, default=MIGRATION_EVERY,
+                        help="exchange best genomes every n generations (0 - never)")
+    parser.add_argument("--migrants", type=int, default=MIGRANTS, help="number of genomes sent to next island")
+    parser.add_argument("--event-driven", action="store_true", help="evaluate generations with EventSimulator")
+    parser.add_argument("--fused", action="store_true", help="evaluate generations with fused kernel")
+    parser.add_argument("--max-ticks", type=int, default=MAX_EPISODE_TICKS,
+                        help="end generation after n time steps, living pilots keep current score (0 - no limit)")
+    parser.add_argument("--max-score", type=int, default=MAX_EPISODE_SCORE,
+                        help="end generation when score reaches n (0 - no limit)")
+    parser.add_argument("--delta-time", type=float, default=PHYSICS_DT, help="simulated time step in seconds")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="save checkpoints every n generations (0 - off)")
+    parser.add_argument("--checkpoint-dir", default=os.path.join(CHECKPOINT_DIR, "islands"),
+                        help="directory for checkpoint files")
+    parser.add_argument("--resume", metavar="DIR", help="checkpoint directory to resume islands from")
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    model = IslandModel(islands=args.islands, population_size=args.population_size, seed=args.seed,
+                        selection_rates=args.selection_rates, mutation_probs=args.mutation_probs,
+                        migrate_every=args.migrate_every, migrants=args.migrants, delta_time=args.delta_time,
+                        event_driven=args.event_driven, fused=args.fused, checkpoint_dir=args.checkpoint_dir,
+                        checkpoint_every=args.checkpoint_every, resume=args.resume,
+                        max_episode_ticks=args.max_ticks, max_episode_score=args.max_score)
+
+    def report(r):
+        print(f"island: {r['island']}  gen_id: {r['generation_id']}  score: {r['score']}  "
+              f"best_fitness: {r['best_fitness']:.3f}  mean_fitness: {r['mean_fitness']:.3f}")
+
+    start = time.perf_counter()
+    model.run(args.generations, callback=report)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.islands} islands x {args.generations} generations in {elapsed:.1f} s "
+          f"({model.evaluations / elapsed:.0f} evals/s)")
+    print(f"best_fitness: {model.best_fitness:.3f} (island {model.best_island}, gen_id: {model.best_generation})")
+
+
+if __name__ == "__main__":
+    main()
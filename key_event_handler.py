@@ -20,6 +20,8 @@ class KeyEventHandler:
 
         # --- MAIN MENU BUTTONS --- #
         if self.current_state == MENU:
+            if key in (arcade.key.A, arcade.key.B, arcade.key.C):
+                self.replay = None
             if key == arcade.key.A:
                 self.current_state = GAME_RUNNING
                 self.AI_mode = True
@@ -36,6 +38,9 @@ class KeyEventHandler:
                 self.simulation_mode = True
                 self.setup()
                 self.population.erase_history()
+            if key == arcade.key.D:
+                self.start_replay()
+                return
 
         # --- GAME RUNNING BUTTONS --- #
         if self.current_state == GAME_RUNNING:
@@ -44,6 +49,11 @@ class KeyEventHandler:
             if self.simulation_mode:
                 if key == arcade.key.R:
                     self.current_state = SIMULATION_MENU
+                elif key == arcade.key.P:
+                    self.profiler.toggle()
+                elif key == arcade.key.T:
+                    self.turbo = not self.turbo
+                    self.turbo_steps = 1
 
             # - SINGLE SHIP MODE -
             else:
@@ -57,6 +67,18 @@ class KeyEventHandler:
                         if key == arcade.key.ESCAPE:
                             self.current_state = MENU
 
+                        # - REPLAY - speed and previous / next generation
+                        elif self.replay is not None:
+                            speed_id = REPLAY_SPEEDS.index(self.replay_speed)
+                            if key == arcade.key.UP:
+                                self.replay_speed = REPLAY_SPEEDS[min(speed_id + 1, len(REPLAY_SPEEDS) - 1)]
+                            elif key == arcade.key.DOWN:
+                                self.replay_speed = REPLAY_SPEEDS[max(speed_id - 1, 0)]
+                            elif key == arcade.key.LEFT:
+                                self.start_replay(self.replay_index - 1)
+                            elif key == arcade.key.RIGHT:
+                                self.start_replay(self.replay_index + 1)
+
         # --- SIMULATION MENU BUTTONS --- #
         if self.current_state == SIMULATION_MENU:
             if key == arcade.key.S:
@@ -4,11 +4,13 @@
 The main purpose of this exercise is to build a simple "space runner" game which will be an environment
 for genetic algorithm implementation.
 
-The game has 3 modes:
+The game has 4 modes:
 A. Random Autopilot - spaceship is steered by AI with randomly initialized neural network
 B. Human Player - spaceship is steered by human player (LEFT and RIGHT arrow keys)
 C. Simulation - in this mode population is generated and evolved until the user decides to stop on current generation
 and save latest genes of most successful pilot to file
+D. Replay - recorded games of the best pilots of generations are played back (UP / DOWN - speed, LEFT / RIGHT -
+previous / next generation)
 
 Tips for moving between screens:
 - Game Over Menu is displayed after spaceship dies in modes A or B. From Game Over Menu user may go to Main Menu
@@ -20,12 +22,19 @@ Run this file to turn on the game.
 """
 import arcade
 import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
 from settings import *
 from game_classes import Obstacle, SpaceShip, Population
+from course import Course
 from drawer import Drawer
 from key_event_handler import KeyEventHandler
 from collision_system import CollisionSystem
+from checkpoint import Checkpointer
+from profiler import Profiler
+from telemetry import Telemetry
+from replay import Replay, ReplayRecorder, list_replays
 
 
 class MyGame(KeyEventHandler, CollisionSystem, Drawer, arcade.Window):
@@ -45,41 +54,233 @@ class MyGame(KeyEventHandler, CollisionSystem, Drawer, arcade.Window):
         # Variables initialization
         self.ship = None
         self.score = 0
+        self.steps = 0
         self.obstacle_list = None
         self.closest_obstacle = None
         self.AI_mode = False
         self.simulation_mode = False
 
+        # Episode limits of simulation (0 - no limit) and early cutoff of generation with decided selection
+        self.max_episode_ticks = MAX_EPISODE_TICKS
+        self.max_episode_score = MAX_EPISODE_SCORE
+        self.early_cutoff = EARLY_CUTOFF
+
         self.current_state = MENU
 
-        self.population = Population()
+        # Drawing caches (see Drawer)
+        self.ship_sprites = None
+        self.ship_sprites_store = None
+        self.ship_sprites_visible = None
+        self.obstacle_sprites = None
+        self.text_cache = {}
+
+        # Random generator used for pilots' genes, evolution and obstacle courses (SEED in settings)
+        self.rng = np.random.default_rng(SEED)
+        self.course = None
+
+        self.population = Population(rng=self.rng)
         self.population.populate()
 
+        # Fixed time step - unsimulated part of frame time and its fraction of step (interpolated rendering)
+        self.accumulator = 0.0
+        self.render_alpha = 1.0
+
+        # Evolution in background thread - window keeps drawing last frame of finished generation meanwhile
+        self.evolver = ThreadPoolExecutor(max_workers=1)
+        self.evolution = None
+        self.evolution_start = 0.0
+        self.evolution_step = ""
+        self.evolution_progress = 0.0
+
+        # Turbo mode (T key) - many simulation steps per update
+        self.turbo = False
+        self.turbo_steps = 1
+
+        # Per-phase timings of frames (P key switches sampling and overlay on / off)
+        self.profiler = Profiler()
+
+        # Periodic checkpoints of population written in background (CHECKPOINT_EVERY in settings)
+        self.checkpointer = Checkpointer()
+
+        # Replays of the best pilots recorded in background (REPLAY_EVERY in settings) and replay being played back
+        self.replay_recorder = ReplayRecorder()
+        self.replay = None
+        self.replay_files = []
+        self.replay_index = 0
+        self.replay_cursor = 0
+        self.replay_speed = 1
+
+        # Per-generation statistics written to file in background (TELEMETRY_PATH in settings)
+        self.telemetry = Telemetry() if TELEMETRY_PATH else None
+
     def setup(self):
         """Set up the game. """
 
         # Create player/population
         if self.simulation_mode:
-            self.population.generation_id += 1
+            self.population.start_generation()
             self.population.ressurect_ships()
 
         else:
-            self.ship = SpaceShip(320, 50, 0, 15)
+            self.ship = SpaceShip(320, 50, 0, 15, rng=self.rng)
 
         # Score
         self.score = 0
+        self.steps = 0
 
-        # Create obstacles
+        # Create obstacles (replay is played on its recorded course)
         self.obstacle_list = []
         self.closest_obstacle = 0
+        if self.replay is not None:
+            self.course = Course(self.replay.course_seed)
+            self.replay_cursor = 0
+        else:
+            self.course = Course(int(self.rng.integers(2 ** 32)))
 
         for i in range(NO_OBSTACLES):
-            obstacle = Obstacle(SCREEN_HEIGHT + i * OBSTACLE_FREQ)
+            obstacle = Obstacle(SCREEN_HEIGHT + i * OBSTACLE_FREQ, self.course)
             self.obstacle_list.append(obstacle)
 
+    def end_generation(self):
+        """Saves checkpoint / statistics of generation which has just died (before its evolution). """
+
+        self.checkpointer.on_generation(self.population)
+        self.replay_recorder.on_generation(self.population, self.course.seed)
+        if self.telemetry is not None:
+            self.telemetry.record(self.population, self.score)
+        self.profiler.end_generation(self.population.generation_id)
+
+    def evolve_population(self):
+        """Evolves population after whole generation died and starts next generation. """
+
+        self.end_generation()
+
+        t = self.profiler.tick()
+        self.population.evolve()
+        self.current_state = GAME_RUNNING
+        self.setup()
+        self.profiler.record("evolve", t)
+
+    def start_evolution(self):
+        """Starts evolution of population in background thread. """
+
+        self.end_generation()
+
+        self.evolution_start = time.perf_counter()
+        self.evolution_step = ""
+        self.evolution_progress = 0.0
+        self.evolution = self.evolver.submit(self.run_evolution)
+
+    def run_evolution(self):
+        """Evolves population (runs in background thread, reports progress to draw_evo_state). """
+
+        def progress(step, done):
+            self.evolution_step, self.evolution_progress = step, done
+
+        t = self.profiler.tick()
+        self.population.evolve(progress=progress)
+        self.profiler.record("evolve", t)
+
+    def finish_evolution(self):
+        """Starts next generation when background evolution is done (and EVOLUTION screen was shown long enough). """
+
+        if not self.evolution.done() or time.perf_counter() - self.evolution_start < EVOLUTION_MIN_TIME:
+            return
+
+        evolution, self.evolution = self.evolution, None
+        evolution.result()
+
+        self.current_state = GAME_RUNNING
+        self.setup()
+        self.accumulator = None  # time spent on EVOLUTION screen is not simulated
+
+    def simulation_step(self, delta_time):
+        """Advances simulation (population of ships) by one step. """
+
+        t = self.profiler.tick()
+        self.check_for_collision()
+
+        # Check if whole generation died (or ends early, see check_episode_end)
+        if self.population.check_if_all_dead() or self.check_episode_end():
+
+            # Deactivate obstacles
+            for i in range(3):
+                self.obstacle_list[i].is_active = False
+
+            self.current_state = EVOLUTION
+
+        # Passing obstacles
+        self.pass_obstacles()
+        t = self.profiler.record("collision", t)
+
+        # Population updates
+        living_idx, decisions = self.population.decide_ships(
+            ai_state=self.AI_mode,
+            gap_x1=self.obstacle_list[self.closest_obstacle].gap_x1,
+            gap_x2=self.obstacle_list[self.closest_obstacle].gap_x2)
+        t = self.profiler.record("inference", t)
+
+        self.population.move_ships(living_idx, decisions)
+
+        # Obstacles update
+        for obstacle in self.obstacle_list:
+            obstacle.update(delta_time)
+        self.profiler.record("physics", t)
+
+        self.steps += 1
+
+    def start_replay(self, index=None):
+        """
+        Loads replay with given index from REPLAY_DIR (the latest one if None) and starts playing it back.
+        Returns False if there are no replays.
+        """
+
+        self.replay_files = list_replays()
+        if not self.replay_files:
+            return False
+
+        self.replay_index = len(self.replay_files) - 1 if index is None else index % len(self.replay_files)
+        self.replay = Replay.load(self.replay_files[self.replay_index])
+
+        self.current_state = GAME_RUNNING
+        self.AI_mode = True
+        self.simulation_mode = False
+        self.accumulator = None
+        self.setup()
+
+        return True
+
+    def turbo_update(self):
+        """
+        Turbo mode - runs turbo_steps fixed time steps (evolving population without pause when generation dies),
+        only the latest state is drawn. Number of steps adapts so that update fits in TURBO_FRAME_BUDGET.
+        """
+
+        start = time.perf_counter()
+        for i in range(self.turbo_steps):
+            if self.current_state == EVOLUTION:
+                self.evolve_population()
+            self.simulation_step(PHYSICS_DT)
+        elapsed = time.perf_counter() - start
+
+        # Adapt number of steps to frame budget (change limited to 2x per frame)
+        ratio = min(max(TURBO_FRAME_BUDGET / max(elapsed, 1e-6), 0.5), 2)
+        self.turbo_steps = min(max(int(self.turbo_steps * ratio), 1), TURBO_MAX_STEPS)
+
+    def on_close(self):
+        """Waits for pending checkpoints, replays and statistics before window is closed. """
+
+        self.checkpointer.close()
+        self.replay_recorder.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
+
+        super().on_close()
+
     def on_draw(self):
         """Called whenever we need to draw the window. """
 
+        t = self.profiler.tick()
         arcade.start_render()
 
         # Draw the background texture
@@ -104,61 +305,103 @@ class MyGame(KeyEventHandler, CollisionSystem, Drawer, arcade.Window):
             self.draw_game()
             self.draw_sim_menu()
 
+        if self.profiler.enabled:
+            self.draw_profiler_overlay(self.profiler.stats())
+            self.profiler.record("draw", t)
+
     def update(self, delta_time):
-        """Updates current state of the game. """
+        """
+        Updates current state of the game. Game is advanced in fixed time steps (PHYSICS_DT) - frame time is
+        accumulated and as many steps as fit in it are run, so game state does not depend on frame rate.
+        Remaining part of step is used to interpolate positions when drawing (render_alpha).
+        """
 
         # --- SIMULATION MODE (POPULATION OF SHIPS) --- #
         if self.simulation_mode:
 
-            if self.current_state == EVOLUTION:
-                time.sleep(0.5)
-                self.population.evolve()
-                self.current_state = GAME_RUNNING
-                self.setup()
+            # Background evolution is finished first (also when turbo mode was switched on meanwhile)
+            if self.current_state == EVOLUTION and self.evolution is not None:
+                self.finish_evolution()
+
+            elif self.turbo and self.current_state in (GAME_RUNNING, EVOLUTION):
+                self.turbo_update()
+                self.accumulator = 0.0
+                self.render_alpha = 1.0
+
+            elif self.current_state == EVOLUTION:
+                self.start_evolution()
 
             elif self.current_state == GAME_RUNNING:
+                for i in range(self.count_steps(delta_time)):
+                    self.simulation_step(PHYSICS_DT)
+                    if self.current_state != GAME_RUNNING:
+                        break
 
-                self.check_for_collision()
+        # --- REPLAY (SINGLE SHIP PLAYED BACK AT REPLAY SPEED) --- #
+        elif self.replay is not None:
+            if self.current_state == GAME_RUNNING:
+                max_steps = int(MAX_STEPS_PER_FRAME * max(self.replay_speed, 1))
+                for i in range(self.count_steps(delta_time * self.replay_speed, max_steps)):
+                    self.single_ship_step(self.replay.delta_time)
+                    if self.current_state != GAME_RUNNING:
+                        break
 
-                # Check if whole generation died
-                if self.population.check_if_all_dead():
+        # --- SINGLE SHIP MODE --- #
+        else:
+            if self.current_state == GAME_RUNNING:
+                for i in range(self.count_steps(delta_time)):
+                    self.single_ship_step(PHYSICS_DT)
+                    if self.current_state != GAME_RUNNING:
+                        break
 
-                    # Deactivate obstacles
-                    for i in range(3):
-                        self.obstacle_list[i].is_active = False
+    def count_steps(self, delta_time, max_steps=MAX_STEPS_PER_FRAME):
+        """Adds frame time to accumulator and returns number of fixed time steps to run (at most max_steps). """
 
-                    self.current_state = EVOLUTION
+        if self.accumulator is None:
+            self.accumulator = 0.0
+            delta_time = 0.0
 
-                # Passing obstacles
-                self.pass_obstacles()
+        self.accumulator += delta_time
+        steps = int(self.accumulator / PHYSICS_DT + 1e-9)
+        self.accumulator -= steps * PHYSICS_DT
 
-                # Population updates
-                for ship in self.population.ships_list:
-                    if ship.alive:
-                        ship.update(ai_state=self.AI_mode,
-                                    gap_x1=self.obstacle_list[self.closest_obstacle].gap_x1,
-                                    gap_x2=self.obstacle_list[self.closest_obstacle].gap_x2)
+        # Time which cannot be caught up is dropped (game slows down instead of running ever longer updates)
+        if steps > max_steps:
+            steps = max_steps
+            self.accumulator = 0.0
 
-                # Obstacles update
-                for obstacle in self.obstacle_list:
-                    obstacle.update(delta_time)
+        self.render_alpha = max(self.accumulator, 0.0) / PHYSICS_DT
 
-        # --- SINGLE SHIP MODE --- #
-        else:
-            if self.current_state == GAME_RUNNING:
+        return steps
+
+    def single_ship_step(self, delta_time):
+        """Advances single ship game by one step. """
+
+        self.check_for_collision()
+
+        self.pass_obstacles()
 
-                self.check_for_collision()
+        # Ship update (in replay decision is taken from recorded stream)
+        decision = None
+        if self.replay is not None:
+            if self.replay_cursor >= len(self.replay) and self.ship.alive:
+                # Recording was cut by episode limit - pilot survived
+                self.ship.alive = False
+                self.ship.pilot.pilot_score = self.score
+                self.current_state = GAME_OVER
+                return
 
-                self.pass_obstacles()
+            decision = self.replay.decisions[self.replay_cursor] if self.replay_cursor < len(self.replay) else 0
+            self.replay_cursor += 1
 
-                # Ship update
-                self.ship.update(ai_state=self.AI_mode,
-                                 gap_x1=self.obstacle_list[self.closest_obstacle].gap_x1,
-                                 gap_x2=self.obstacle_list[self.closest_obstacle].gap_x2)
+        self.ship.update(ai_state=self.AI_mode,
+                         gap_x1=self.obstacle_list[self.closest_obstacle].gap_x1,
+                         gap_x2=self.obstacle_list[self.closest_obstacle].gap_x2,
+                         decision=decision)
 
-                # Obstacles update
-                for obstacle in self.obstacle_list:
-                    obstacle.update(delta_time)
+        # Obstacles update
+        for obstacle in self.obstacle_list:
+            obstacle.update(delta_time)
 
 
 def main():
@@ -0,0 +1,149 @@
+"""
+Parallel fitness evaluation - population's genomes are sharded across pool of worker processes
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from settings import PHYSICS_DT, COURSES_PER_GENERATION, FITNESS_AGGREGATE, MAX_EPISODE_TICKS, \
+    MAX_EPISODE_SCORE
+from ext_functions import GENOME_LEN, GENOME_DTYPE
+from game_classes import Population
+from simulation_engine import SimulationEngine
+from vector_env import VectorEnv
+from event_simulator import EventSimulator
+from fused_kernel import FusedEvaluator
+
+
+# Genome matrix shared with the main process (attached once per worker process)
+_worker_shm = None
+_worker_genomes = None
+
+
+def _init_worker(shm_name, shape):
+    """Attaches worker process to shared genome matrix. """
+
+    global _worker_shm, _worker_genomes
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_genomes = np.ndarray(shape, dtype=GENOME_DTYPE, buffer=_worker_shm.buf)
+
+
+def _evaluate_shard(start, stop, stay_decs_count, move_decs_count, skip_mask, course_seed, delta_time, courses,
+                    aggregate, event_driven, fused, max_episode_ticks, max_episode_score, stay_frac, policy_table):
+    """
+    Plays one generation with pilots from rows start:stop of shared genome matrix on obstacle course given by seed
+    (on more courses at once with VectorEnv if courses > 1, with EventSimulator if event_driven, with FusedEvaluator
+    if fused).
+    Pilots selected by skip_mask (optional) do not play. Episode limits apply, early cutoff does not - selection of
+    shard is not selection of population.
+    Returns: start, stop, pilot scores, decision counters, fitness, game score and number of steps
+    """
+
+    population = Population(size=stop - start, stay_frac=stay_frac)
+    population.populate()
+    population.brain.use_policy_table(policy_table)
+    population.set_genomes(_worker_genomes[start:stop])
+    population.store.stay_decs_count[:] = stay_decs_count
+    population.store.move_decs_count[:] = move_decs_count
+
+    # The same seed gives the same obstacle course in every worker
+    engine = SimulationEngine(delta_time=delta_time, population=population, max_episode_ticks=max_episode_ticks,
+                              max_episode_score=max_episode_score, early_cutoff=False)
+    engine.skip_mask = skip_mask
+    if courses > 1:
+        engine.evaluator = VectorEnv(courses, aggregate, delta_time, max_episode_ticks, max_episode_score)
+    elif event_driven:
+        engine.evaluator = EventSimulator(delta_time, max_episode_ticks, max_episode_score)
+    elif fused:
+        engine.evaluator = FusedEvaluator(delta_time, max_episode_ticks=max_episode_ticks,
+                                          max_episode_score=max_episode_score)
+    engine.run_generation(course_seed)
+
+    store = population.store
+    return (start, stop, store.pilot_score, store.stay_decs_count, store.move_decs_count, store.fitness,
+            engine.score, engine.steps)
+
+
+class ParallelEvaluator:
+    """
+    Evaluates fitness of population in pool of worker processes. Genomes are passed through shared memory matrix,
+    each worker plays its shard of population on the same seeded obstacle course and sends back scores, decision
+    counters and fitness, which are written to population's ShipStore (selection and evolve work as before).
+
+    Methods:
+        - evaluate - plays one generation of population in worker processes
+        - close - shuts down worker processes and releases shared memory
+    """
+
+    def __init__(self, population_size, workers=None, delta_time=PHYSICS_DT, courses=COURSES_PER_GENERATION,
+                 aggregate=FITNESS_AGGREGATE, event_driven=False, fused=False, max_episode_ticks=MAX_EPISODE_TICKS,
+                 max_episode_score=MAX_EPISODE_SCORE):
+
+        self.population_size = population_size
+        self.delta_time = delta_time
+
+        # Number of obstacle courses every genome is played on (see VectorEnv) and aggregate of their fitness
+        self.courses = courses
+        self.aggregate = aggregate
+        self.event_driven = event_driven
+        self.fused = fused
+        self.max_episode_ticks = max_episode_ticks
+        self.max_episode_score = max_episode_score
+
+        shape = (population_size, GENOME_LEN)
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(GENOME_DTYPE).itemsize)
+        self.genomes = np.ndarray(shape, dtype=GENOME_DTYPE, buffer=self.shm.buf)
+
+        self.workers = workers or os.cpu_count()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.shm.name, shape))
+
+        # Shard boundaries - one contiguous slice of population per worker
+        self.bounds = np.linspace(0, population_size, min(self.workers, population_size) + 1).astype(int)
+
+    def evaluate(self, population, course_seed, skip_mask=None):
+        """
+        Plays one generation of population in worker processes (except ships selected by optional skip_mask).
+        All ships are dead afterwards.
+        Returns: game score and number of steps of the longest playing shard
+        """
+
+        self.genomes[:] = population.get_genomes()
+        store = population.store
+
+        futures = [self.pool.submit(_evaluate_shard, start, stop,
+                                    store.stay_decs_count[start:stop], store.move_decs_count[start:stop],
+                                    None if skip_mask is None else skip_mask[start:stop],
+                                    course_seed, self.delta_time, self.courses, self.aggregate,
+                                    self.event_driven, self.fused, self.max_episode_ticks, self.max_episode_score,
+                                    population.stay_frac, population.brain.policy_table)
+                   for start, stop in zip(self.bounds[:-1], self.bounds[1:])]
+
+        score, steps = 0, 0
+        for future in futures:
+            start, stop, pilot_score, stay, move, fitness, shard_score, shard_steps = future.result()
+            store.pilot_score[start:stop] = pilot_score
+            store.stay_decs_count[start:stop] = stay
+            store.move_decs_count[start:stop] = move
+            store.fitness[start:stop] = fitness
+            score, steps = max(score, shard_score), max(steps, shard_steps)
+
+        store.alive[:] = False
+        population.check_if_all_dead()
+
+        return score, steps
+
+    def close(self):
+        """Shuts down worker processes and releases shared memory. """
+
+        self.pool.shutdown()
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
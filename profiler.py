@@ -0,0 +1,122 @@
+"""
+Profiler - per-phase timings of game frames (collision, inference, physics, evolve, draw)
+"""
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+from settings import *
+
+
+PHASES = ("collision", "inference", "physics", "evolve", "draw")
+
+
+class Profiler:
+    """
+    Lightweight instrumentation of game loop. Timings of every phase are kept in ring buffers (last PROFILER_BUFFER
+    samples) and aggregated per generation into trace, which can be exported to CSV / JSON file.
+    When disabled, tick and record only check the enabled flag.
+
+    Usage:
+        t = profiler.tick()
+        ...  # phase code
+        t = profiler.record("collision", t)
+
+    Methods:
+        - toggle - switches sampling on / off
+        - tick - returns current time (0 when disabled)
+        - record - records time of phase which started at given time
+        - stats - returns mean / p99 of phases from ring buffers
+        - end_generation - closes generation in trace (and appends it to trace file)
+        - save_trace - writes whole trace to CSV or JSON file
+    """
+
+    def __init__(self, buffer_size=PROFILER_BUFFER, trace_path=PROFILER_TRACE, enabled=False):
+
+        self.enabled = enabled
+        self.trace_path = trace_path
+
+        # Ring buffers with last timings [ms] of every phase
+        self.buffers = {phase: np.zeros(buffer_size) for phase in PHASES}
+        self.counts = dict.fromkeys(PHASES, 0)
+
+        # Timings of current generation (sum, max, number of samples) and finished generations
+        self.generation = {phase: [0.0, 0.0, 0] for phase in PHASES}
+        self.trace = []
+
+    def toggle(self):
+        """Switches sampling on / off. """
+
+        self.enabled = not self.enabled
+
+    def tick(self):
+        """Returns current time when enabled, 0 otherwise. """
+
+        return time.perf_counter() if self.enabled else 0
+
+    def record(self, phase, start):
+        """Records duration of phase which started at start (value of tick). Returns current time (see tick). """
+
+        if not self.enabled:
+            return 0
+
+        now = time.perf_counter()
+        duration = (now - start) * 1000
+
+        buffer = self.buffers[phase]
+        buffer[self.counts[phase] % len(buffer)] = duration
+        self.counts[phase] += 1
+
+        generation = self.generation[phase]
+        generation[0] += duration
+        generation[1] = max(generation[1], duration)
+        generation[2] += 1
+
+        return now
+
+    def stats(self):
+        """Returns {phase: (mean ms, p99 ms)} for phases with samples in ring buffers. """
+
+        stats = {}
+        for phase, buffer in self.buffers.items():
+            samples = buffer[:min(self.counts[phase], len(buffer))]
+            if samples.size:
+                stats[phase] = (samples.mean(), np.percentile(samples, 99))
+
+        return stats
+
+    def end_generation(self, generation_id):
+        """Closes timings of finished generation - adds them to trace and appends them to trace file (if set). """
+
+        if not self.enabled:
+            return
+
+        row = {"generation": generation_id}
+        for phase, (total, longest, samples) in self.generation.items():
+            row[f"{phase}_mean_ms"] = total / samples if samples else 0.0
+            row[f"{phase}_max_ms"] = longest
+            row[f"{phase}_samples"] = samples
+        self.trace.append(row)
+        self.generation = {phase: [0.0, 0.0, 0] for phase in PHASES}
+
+        if self.trace_path:
+            new_file = not os.path.exists(self.trace_path)
+            with open(self.trace_path, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(row)
+
+    def save_trace(self, path):
+        """Writes trace of all generations to file - JSON if path ends with .json, CSV otherwise. """
+
+        with open(path, "w", newline="") as f:
+            if path.endswith(".json"):
+                json.dump(self.trace, f, indent=2)
+            elif self.trace:
+                writer = csv.DictWriter(f, fieldnames=list(self.trace[0]))
+                writer.writeheader()
+                writer.writerows(self.trace)
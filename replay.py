@@ -0,0 +1,165 @@
+"""
+Replays - course seed and 2-bit packed decision stream of pilot, played back without neural network
+"""
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from settings import *
+from game_classes import Population
+from simulation_engine import SimulationEngine
+
+
+def pack_decisions(decisions):
+    """Packs decisions (0 - STAY, 1 - LEFT, 2 - RIGHT) into bytes, 4 decisions per byte. """
+
+    decisions = np.asarray(decisions, dtype=np.uint8)
+    padded = np.zeros(-(-len(decisions) // 4) * 4, dtype=np.uint8)
+    padded[:len(decisions)] = decisions
+    quads = padded.reshape(-1, 4)
+
+    return quads[:, 0] | (quads[:, 1] << 2) | (quads[:, 2] << 4) | (quads[:, 3] << 6)
+
+
+def unpack_decisions(packed, n):
+    """Returns first n decisions packed with pack_decisions. """
+
+    packed = np.asarray(packed, dtype=np.uint8)
+    quads = np.stack([(packed >> shift) & 3 for shift in (0, 2, 4, 6)], axis=1)
+
+    return quads.reshape(-1)[:n]
+
+
+def record_decisions(genome, course_seed, delta_time=PHYSICS_DT, max_episode_ticks=MAX_EPISODE_TICKS,
+                     max_episode_score=MAX_EPISODE_SCORE, max_ticks=REPLAY_MAX_TICKS):
+    """
+    Plays single pilot with given genome on obstacle course given by seed (headless). Game on seeded course is
+    deterministic, so the pilot makes the same decisions as during its generation (with the same episode limits).
+    Recording stops after max_ticks time steps even without episode tick limit (pilot which never dies).
+    Returns: array of decisions (one per time step) and pilot's score
+    """
+
+    max_episode_ticks = min(max_episode_ticks or max_ticks, max_ticks)
+
+    population = Population(size=1)
+    population.populate()
+    population.set_genomes(genome[None])
+
+    engine = SimulationEngine(delta_time=delta_time, population=population, max_episode_ticks=max_episode_ticks,
+                              max_episode_score=max_episode_score, early_cutoff=False)
+    engine.setup(course_seed)
+
+    decisions = []
+    while not engine.step():
+        decisions.append(engine.decisions[0])
+
+    return np.array(decisions, dtype=np.uint8), int(population.store.pilot_score[0])
+
+
+class Replay:
+    """
+    Replay of single pilot - course seed and decision of every time step (stored packed, 2 bits per decision), so
+    game can be played back exactly without evaluating neural network.
+
+    Methods:
+        - save - saves replay to .npz file
+        - load - loads replay from file
+    """
+
+    def __init__(self, course_seed, decisions, generation_id=0, score=0, fitness=0.0, delta_time=PHYSICS_DT):
+
+        self.course_seed = course_seed
+        self.decisions = np.asarray(decisions, dtype=np.uint8)
+        self.generation_id = generation_id
+        self.score = score
+        self.fitness = fitness
+        self.delta_time = delta_time
+
+    def __len__(self):
+        return len(self.decisions)
+
+    def save(self, path):
+        """Saves replay to .npz file. """
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, course_seed=np.array(self.course_seed, dtype=np.uint64),
+                            decisions=pack_decisions(self.decisions), steps=np.array(len(self.decisions)),
+                            generation_id=np.array(self.generation_id), score=np.array(self.score),
+                            fitness=np.array(self.fitness), delta_time=np.array(self.delta_time))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Loads replay saved with save. """
+
+        with np.load(path) as f:
+            return cls(course_seed=int(f["course_seed"]),
+                       decisions=unpack_decisions(f["decisions"], int(f["steps"])),
+                       generation_id=int(f["generation_id"]), score=int(f["score"]), fitness=float(f["fitness"]),
+                       delta_time=float(f["delta_time"]))
+
+
+def list_replays(directory=REPLAY_DIR):
+    """Returns sorted paths of replay files in directory. """
+
+    return sorted(glob.glob(os.path.join(directory, "gen_*.npz")))
+
+
+class ReplayRecorder:
+    """
+    Records replay of the best pilot every `every` generations. Best genome is copied and its decisions are
+    recorded (by replaying it headless on the same course) and written by background thread.
+
+    Methods:
+        - on_generation - records replay of the best pilot of played generation
+        - record - records and saves replay (runs in background thread)
+        - close - waits for pending replays
+    """
+
+    def __init__(self, directory=REPLAY_DIR, every=REPLAY_EVERY, delta_time=PHYSICS_DT,
+                 max_episode_ticks=MAX_EPISODE_TICKS, max_episode_score=MAX_EPISODE_SCORE):
+
+        self.directory = directory
+        self.every = every
+        self.delta_time = delta_time
+        self.max_episode_ticks = max_episode_ticks
+        self.max_episode_score = max_episode_score
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.last_write = None
+
+    def path(self, generation_id):
+        """Returns path of replay file of given generation. """
+
+        return os.path.join(self.directory, f"gen_{generation_id:06d}.npz")
+
+    def on_generation(self, population, course_seed):
+        """Records replay of the best pilot of played generation (before evolution) in background. """
+
+        if not self.every or population.generation_id % self.every:
+            return
+
+        store = population.store
+        best = int(np.argmax(store.fitness))
+        self.last_write = self.writer.submit(self.record, store.genomes[best].copy(), course_seed,
+                                             population.generation_id, float(store.fitness[best]))
+
+    def record(self, genome, course_seed, generation_id, fitness):
+        """Records decisions of pilot with given genome and saves its replay. """
+
+        decisions, score = record_decisions(genome, course_seed, self.delta_time, self.max_episode_ticks,
+                                            self.max_episode_score)
+        replay = Replay(course_seed, decisions, generation_id, score, fitness, self.delta_time)
+        replay.save(self.path(generation_id))
+
+        return replay
+
+    def close(self):
+        """Waits for pending replays and stops writer thread. """
+
+        self.writer.shutdown(wait=True)
@@ -22,6 +22,63 @@ POPULATION_SIZE = 200    # Must be > 5
 MUTATION_PROB = 0.1   # Previous best 0.2
 SELECTION_RATE = 0.1
 STAY_FRAC = 0.4
+SEED = None     # Seed of random generator (None - different run every time)
+FITNESS_CACHE_SIZE = 10000  # Max number of genome results kept in fitness cache
+COURSES_PER_GENERATION = 1  # Number of obstacle courses every genome is evaluated on in headless training
+FITNESS_AGGREGATE = "mean"  # Aggregate of fitness from all courses: "mean" or "min"
+FUSED_BACKEND = "auto"      # Fused kernel (fused_kernel.py): "numba", "numpy" or "auto" (see FUSED_NUMBA_MAX_WEIGHTS)
+FUSED_CHUNK_TICKS = 512     # Number of ticks played by fused kernel per call
+FUSED_NUMBA_MAX_WEIGHTS = 2048  # "auto" uses numpy for networks with more weights (scalar Numba kernel is slower)
+
+# --- Episode limits ---
+MAX_EPISODE_TICKS = 0   # Generation ends after n time steps, living pilots get fitness for current score (0 - no limit)
+MAX_EPISODE_SCORE = 0   # Generation ends when score reaches n, living pilots get fitness for it (0 - no limit)
+EARLY_CUTOFF = False    # Generation ends as soon as selection (membership of top ships) can no longer change
+
+# --- Island model (islands.py) ---
+ISLANDS = 4             # Number of populations evolved in parallel processes
+MIGRATION_EVERY = 10    # Best genomes are sent to next island every n generations
+MIGRANTS = 5            # Number of genomes sent to next island
+ISLAND_SELECTION_RATES = (0.05, 0.1, 0.15, 0.2)    # Selection rates of islands (cycled)
+ISLAND_MUTATION_PROBS = (0.2, 0.1, 0.1, 0.05)      # Mutation probabilities of islands (cycled)
 
 # --- Neural network parameters ---
 NEURONS = 8
+HIDDEN_LAYERS = [NEURONS]   # Sizes of hidden layers (e.g. [16, 8] - two hidden layers), input and output have 3 values
+BRAIN_DTYPE = "float32"     # dtype of genes and activations: "float32" or "float16" (half memory, slower on CPU)
+POLICY_TABLE = "off"        # Decisions looked up in per-obstacle tables: "off", "eager" or "lazy" (see PolicyTable)
+POLICY_TABLE_LATTICE = True # Table holds only x positions reachable with MOVEMENT_SPEED steps (otherwise every x)
+
+# --- Time step ---
+PHYSICS_DT = 1/60           # Fixed simulated time step [s] (game window, turbo mode and headless training)
+MAX_STEPS_PER_FRAME = 8     # Max number of time steps caught up per frame (when frames are slower, game slows down)
+
+# --- Evolution screen ---
+EVOLUTION_MIN_TIME = 0.5    # Min time [s] of EVOLUTION screen (population evolves in background thread meanwhile)
+
+# --- Turbo mode ---
+TURBO_FRAME_BUDGET = 0.012  # Time [s] of simulation steps per update, keeps window responsive
+TURBO_MAX_STEPS = 2000      # Max number of simulation steps per update
+
+# --- Profiling ---
+PROFILER_BUFFER = 600   # Number of last frames kept for every phase
+PROFILER_TRACE = "profile_trace.csv"    # Per-generation timings file (None - off)
+
+# --- Telemetry ---
+TELEMETRY_PATH = "telemetry.jsonl"  # Per-generation statistics file (None - off)
+TELEMETRY_QUEUE = 1000              # Max number of records waiting for writer thread (the rest is dropped)
+
+# --- Replays ---
+REPLAY_DIR = "replays"  # Directory for replays of the best pilots
+REPLAY_EVERY = 50       # Record replay of the best pilot every n generations (0 - off), each one plays its course again
+REPLAY_MAX_TICKS = 36000    # Max number of recorded time steps (10 min of game), also without episode tick limit
+REPLAY_SPEEDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)    # Playback speeds (UP / DOWN keys)
+
+# --- Hyperparameter sweeps (sweep.py) ---
+SWEEP_DIR = "sweeps"        # Directory for checkpoints and summaries of sweeps
+SWEEP_MIN_GENERATIONS = 10  # Generations of the first rung of successive halving
+SWEEP_ETA = 2               # Only the best 1/eta of runs continue to next rung (eta times more generations)
+
+# --- Checkpoints ---
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_EVERY = 10   # Auto-checkpoint every n generations (0 - off)
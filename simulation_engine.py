@@ -0,0 +1,222 @@
+"""
+Headless simulation engine - evolves population of ships without arcade.Window, using fixed simulated delta_time
+"""
+import numpy as np
+
+from settings import *
+from game_classes import Obstacle, Population
+from course import Course
+from collision_system import CollisionSystem
+
+
+class SimulationEngine(CollisionSystem):
+    """
+    Owns population, obstacles and collision logic and steps them as fast as CPU allows (no rendering, no frame rate
+    limit). Game logic is the same as in simulation mode of MyGame.
+
+    All random draws (initial genes, evolution, obstacle course seeds) come from population's rng, so the same seed
+    gives the same training run. With course_seed set every generation is played on the same obstacle course.
+
+    Generation ends when all ships are dead or earlier, when tick / score budget is used up or (early_cutoff) when
+    selection can no longer change (see CollisionSystem.check_episode_end). Early cutoff is not used for generations
+    with ships skipped by fitness cache, as their fitness is not known until the end of generation.
+
+    Methods:
+        - setup - sets up new generation (resurrects ships and creates new obstacles)
+        - step - advances simulation by one fixed time step
+        - run_generation - evaluates single generation (results of genomes found in fitness cache are reused)
+        - play_generation - plays single generation until all ships are dead (or evaluates it with evaluator)
+        - run - plays and evolves population for given number of generations
+    """
+
+    def __init__(self, delta_time=PHYSICS_DT, population=None, evaluator=None, seed=SEED, course_seed=None,
+                 fitness_cache=None, max_episode_ticks=MAX_EPISODE_TICKS, max_episode_score=MAX_EPISODE_SCORE,
+                 early_cutoff=EARLY_CUTOFF):
+
+        # Fixed simulated time step
+        self.delta_time = delta_time
+
+        # Optional ParallelEvaluator - plays generations in worker processes
+        self.evaluator = evaluator
+
+        # Optional FitnessCache - genomes already played on the same course are not played again
+        self.fitness_cache = fitness_cache
+        self.course_seed = course_seed
+        self.skip_mask = None   # ships which are not played in current generation (dead from the start)
+        self.played_course_seed = None  # course seed of the last evaluated generation
+
+        # Episode limits (0 - no limit) and early cutoff of generation with decided selection
+        self.max_episode_ticks = max_episode_ticks
+        self.max_episode_score = max_episode_score
+        self.early_cutoff = early_cutoff
+
+        # Variables initialization (names shared with MyGame, used by CollisionSystem)
+        self.ship = None
+        self.score = 0
+        self.obstacle_list = None
+        self.closest_obstacle = None
+        self.course = None
+        self.AI_mode = True
+        self.simulation_mode = True
+        self.steps = 0
+        self.decisions = None
+
+        self.current_state = GAME_RUNNING
+
+        if population is None:
+            population = Population(rng=np.random.default_rng(seed))
+            population.populate()
+        self.population = population
+        self.rng = population.rng
+
+    def new_course_seed(self):
+        """Draws seed of obstacle course for next generation. """
+
+        if self.course_seed is not None:
+            return self.course_seed
+
+        return int(self.rng.integers(2 ** 32))
+
+    def setup(self, course_seed=None):
+        """Set up new generation played on obstacle course given by seed (new seed is drawn if None). """
+
+        self.population.start_generation()
+        self.population.ressurect_ships()
+        if self.skip_mask is not None:
+            self.population.store.alive[self.skip_mask] = False
+
+        # Score
+        self.score = 0
+        self.steps = 0
+
+        # Create obstacles
+        self.obstacle_list = []
+        self.closest_obstacle = 0
+        self.course = Course(course_seed if course_seed is not None else self.new_course_seed())
+
+        for i in range(NO_OBSTACLES):
+            obstacle = Obstacle(SCREEN_HEIGHT + i * OBSTACLE_FREQ, self.course)
+            self.obstacle_list.append(obstacle)
+
+        self.current_state = GAME_RUNNING
+
+    def step(self):
+        """Advances simulation by one time step. Returns True when whole generation is dead. """
+
+        self.check_for_collision()
+
+        # Check if whole generation died (or ends early)
+        if self.population.check_if_all_dead():
+            self.current_state = EVOLUTION
+            return True
+
+        if self.check_episode_end():
+            self.current_state = EVOLUTION
+            return True
+
+        # Passing obstacles
+        self.pass_obstacles()
+
+        # Population updates (decisions of living ships are kept for replay recording)
+        living_idx, self.decisions = self.population.decide_ships(
+            ai_state=self.AI_mode,
+            gap_x1=self.obstacle_list[self.closest_obstacle].gap_x1,
+            gap_x2=self.obstacle_list[self.closest_obstacle].gap_x2)
+        self.population.move_ships(living_idx, self.decisions)
+
+        # Obstacles update
+        for obstacle in self.obstacle_list:
+            obstacle.update(self.delta_time)
+
+        self.steps += 1
+        return False
+
+    def run_generation(self, course_seed=None):
+        """
+        Evaluates single generation. With fitness cache only genomes not found in cache are played (each distinct
+        genome once), the rest get their results from cache. Returns score of the best ship.
+        """
+
+        if course_seed is None:
+            course_seed = self.new_course_seed()
+        self.played_course_seed = course_seed
+
+        cache = self.fitness_cache
+        if cache is None:
+            return self.play_generation(course_seed)
+
+        # Cached result is score and decisions of one course - fitness aggregated from many courses is not rebuilt
+        if getattr(self.evaluator, "courses", 1) > 1:
+            raise ValueError("Fitness cache cannot be used with evaluation on more than one course")
+
+        store = self.population.store
+        keys = cache.keys(store.genomes, course_seed)
+
+        # Results reused in this generation are kept aside - cache.put below may evict them (cache smaller than
+        # generation), duplicates of played genomes get results of their first copy
+        results = {}
+        play = np.zeros(len(keys), dtype=bool)
+        for i, key in enumerate(keys):
+            if key in results:
+                continue
+            results[key] = cache.get(key)
+            play[i] = results[key] is None
+
+        stay_decs_count = store.stay_decs_count.copy()
+        move_decs_count = store.move_decs_count.copy()
+
+        # Fitness of skipped ships is not known while generation is played, so selection cannot be decided early
+        self.skip_mask = ~play
+        early_cutoff, self.early_cutoff = self.early_cutoff, False
+        try:
+            self.play_generation(course_seed)
+        finally:
+            self.skip_mask = None
+            self.early_cutoff = early_cutoff
+
+        for i in np.flatnonzero(play):
+            results[keys[i]] = (store.pilot_score[i], store.stay_decs_count[i] - stay_decs_count[i],
+                                store.move_decs_count[i] - move_decs_count[i])
+            cache.put(keys[i], results[keys[i]])
+
+        # Results of survivors / duplicates
+        reused = np.flatnonzero(~play)
+        for i in reused:
+            store.pilot_score[i], stay_decs, move_decs = results[keys[i]]
+            store.stay_decs_count[i] = stay_decs_count[i] + stay_decs
+            store.move_decs_count[i] = move_decs_count[i] + move_decs
+        store.calc_fitness(~play)
+
+        if reused.size:
+            self.score = max(self.score, int(store.pilot_score[reused].max()))
+        cache.count(hits=int(reused.size), misses=int(np.count_nonzero(play)))
+
+        return self.score
+
+    def play_generation(self, course_seed):
+        """Plays single generation until all ships are dead. Returns score of the best ship. """
+
+        if self.evaluator is not None:
+            self.population.start_generation()
+            self.score, self.steps = self.evaluator.evaluate(self.population, course_seed=course_seed,
+                                                             skip_mask=self.skip_mask)
+            self.current_state = EVOLUTION
+            return self.score
+
+        self.setup(course_seed)
+        while not self.step():
+            pass
+
+        return self.score
+
+    def run(self, generations, callback=None):
+        """
+        Plays and evolves population for given number of generations.
+        callback (optional) is called after each generation with the engine as the only argument.
+        """
+
+        for i in range(generations):
+            self.run_generation()
+            if callback is not None:
+                callback(self)
+            self.population.evolve()
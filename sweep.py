@@ -0,0 +1,329 @@
+"""
+--- SpaceAI hyperparameter sweep ---
+
+Grid or random search over ExperimentConfig parameters. Every run is headless training with its own seed, runs are
+scheduled on bounded pool of worker processes (fresh process per task, so runs can have different network
+architectures). Runs are stopped early with successive halving: all runs play first rung of generations, the best
+1/eta of them continue (from their checkpoints) to next rung with eta times more generations and so on. Results of all
+runs are collected into one summary table (printed and written to summary.csv, the best config to best_config.json).
+
+Spec (JSON file):
+    {
+        "name": "mutation",                     # directory in sweeps/ (default: name of spec file)
+        "search": "grid",                       # "grid" or "random" (with "samples")
+        "params": {"mutation_prob": [0.05, 0.1, 0.2], "neurons": [8, 16]},
+        "base": {"population_size": 200, "max_episode_score": 500},    # parameters shared by all runs
+        "generations": 80, "min_generations": 10, "eta": 2, "repeats": 1, "seed": 0
+    }
+Random search values: list (choice), {"uniform": [a, b]}, {"loguniform": [a, b]} or {"int": [a, b]}.
+
+Usage:
+    python -m sweep sweep.json --workers 4
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from experiment import ExperimentConfig
+from settings import SEED, SWEEP_DIR, SWEEP_ETA, SWEEP_MIN_GENERATIONS
+
+
+def sample_value(values, rng):
+    """Draws value of one parameter for random search (see module docstring). """
+
+    if isinstance(values, list):
+        return values[int(rng.integers(len(values)))]
+
+    if not isinstance(values, dict):
+        return values
+
+    (kind, (low, high)), = values.items()
+    if kind == "uniform":
+        return float(rng.uniform(low, high))
+    if kind == "loguniform":
+        return float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    if kind == "int":
+        return int(rng.integers(low, high + 1))
+
+    raise ValueError(f"Unknown distribution: {kind} (expected 'uniform', 'loguniform' or 'int')")
+
+
+def grid_params(params):
+    """Returns list of all combinations of parameter values (lists are swept, other values are fixed). """
+
+    names = list(params)
+    values = []
+    for name in names:
+        if isinstance(params[name], dict):
+            raise ValueError(f"Distribution of {name} can be used only in random search")
+        values.append(params[name] if isinstance(params[name], list) else [params[name]])
+
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def random_params(params, samples, rng):
+    """Returns list of samples of parameter values drawn with sample_value. """
+
+    return [{name: sample_value(values, rng) for name, values in params.items()} for i in range(samples)]
+
+
+def _run_trial(config, generations, checkpoint, resume):
+    """
+    Plays given number of generations of one run (worker process) - from its checkpoint if resume, otherwise from
+    new population. Checkpoint of the last played generation is saved for next rung.
+    Returns: best fitness of every played generation, game score of the last one, total number of steps and wall time
+    """
+
+    start = time.perf_counter()
+
+    # Architecture is read by game modules at import time, so it is applied before they are imported
+    config = ExperimentConfig.from_dict(config)
+    config.apply_architecture()
+    engine = config.engine()
+    population = engine.population
+
+    # Checkpoint holds played generation, so run resumes with its evolution
+    if resume:
+        population.load(checkpoint)
+        population.evolve()
+
+    best_fitness = []
+    steps = 0
+    for i in range(generations):
+        engine.run_generation()
+        best_fitness.append(float(population.store.fitness.max()))
+        steps += engine.steps
+        if i < generations - 1:
+            population.evolve()
+
+    population.save(checkpoint)
+
+    return {"best_fitness": best_fitness, "score": engine.score, "steps": steps,
+            "wall_time": time.perf_counter() - start}
+
+
+class Sweep:
+    """
+    Hyperparameter sweep - configs of runs built from spec (grid or random search, per-run seeds spawned from spec's
+    seed) and their synchronous successive halving on pool of `workers` processes.
+
+    Run's metric is mean best fitness over generations of its last rung, so runs stopped at the same rung are compared
+    on the same number of generations. Summary is sorted by number of played generations and metric.
+
+    Methods:
+        - configs - returns parameters of every run
+        - rungs - returns total number of generations at the end of every rung
+        - run - plays all runs with successive halving
+        - summary - returns rows of summary table
+        - print_summary / write_summary - prints summary table / writes it to summary.csv and best_config.json
+    """
+
+    def __init__(self, spec, workers=None, directory=SWEEP_DIR):
+
+        unknown = set(spec) - {"name", "search", "params", "base", "samples", "generations", "min_generations",
+                               "eta", "repeats", "seed"}
+        if unknown:
+            raise ValueError(f"Unknown sweep spec keys: {', '.join(sorted(unknown))}")
+        if spec.get("search", "grid") not in ("grid", "random"):
+            raise ValueError(f"Unknown search: {spec['search']} (expected 'grid' or 'random')")
+
+        self.name = spec.get("name", "sweep")
+        self.search = spec.get("search", "grid")
+        self.params = spec.get("params", {})
+        self.base = spec.get("base", {})
+        self.samples = spec.get("samples", 10)
+        self.generations = spec.get("generations", 100)
+        self.min_generations = min(spec.get("min_generations", SWEEP_MIN_GENERATIONS), self.generations)
+        self.eta = spec.get("eta", SWEEP_ETA)
+        self.repeats = spec.get("repeats", 1)
+        self.seed = spec.get("seed", SEED)
+
+        if self.eta < 2:
+            raise ValueError(f"Successive halving needs eta >= 2 (got {self.eta})")
+
+        self.workers = workers or os.cpu_count()
+        self.directory = os.path.join(directory, self.name)
+
+        # Trials - run id, parameters, played generations, metric and status ("running", "stopped" or "finished")
+        self.trials = [{"run": i, "config": config, "generations": 0, "best_fitness": [], "metric": None,
+                        "score": 0, "steps": 0, "wall_time": 0.0, "status": "running"}
+                       for i, config in enumerate(self.configs())]
+
+    def configs(self):
+        """Returns list of parameters of every run (checked with ExperimentConfig, swept ones first). """
+
+        rng = np.random.default_rng(self.seed)
+        if self.search == "grid":
+            points = grid_params(self.params)
+        else:
+            points = random_params(self.params, self.samples, rng)
+
+        seed_sequences = np.random.SeedSequence(self.seed).spawn(len(points) * self.repeats)
+        configs = []
+        for i, (point, repeat) in enumerate(itertools.product(points, range(self.repeats))):
+            config = {**point, **{k: v for k, v in self.base.items() if k not in point}}
+            config.setdefault("seed", int(seed_sequences[i].generate_state(1)[0]))
+            ExperimentConfig.from_dict(config)
+            configs.append(config)
+
+        return configs
+
+    def rungs(self):
+        """Returns total number of generations of runs at the end of every rung. """
+
+        rungs = []
+        generations = self.min_generations
+        while generations < self.generations:
+            rungs.append(generations)
+            generations *= self.eta
+
+        return rungs + [self.generations]
+
+    def checkpoint_path(self, trial):
+        """Returns path of run's checkpoint file. """
+
+        return os.path.join(self.directory, f"run_{trial['run']:03d}", "latest.npz")
+
+    def run(self, callback=None):
+        """
+        Plays all runs with successive halving. callback (optional) is called with every trial when its rung is
+        played (dictionary with run, config, generations, metric and status).
+        """
+
+        # Fresh spawned process per task - game modules are imported with architecture of the run
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                 max_tasks_per_child=1) as pool:
+
+            active = list(self.trials)
+            rungs = self.rungs()
+            for rung, generations in enumerate(rungs):
+                futures = {pool.submit(_run_trial, trial["config"], generations - trial["generations"],
+                                       self.checkpoint_path(trial), trial["generations"] > 0): trial
+                           for trial in active}
+
+                for future in as_completed(futures):
+                    trial = futures[future]
+                    result = future.result()
+
+                    trial["metric"] = float(np.mean(result["best_fitness"]))
+                    trial["best_fitness"] += result["best_fitness"]
+                    trial["generations"] = generations
+                    trial["score"] = result["score"]
+                    trial["steps"] += result["steps"]
+                    trial["wall_time"] += result["wall_time"]
+                    if rung == len(rungs) - 1:
+                        trial["status"] = "finished"
+
+                    if callback is not None:
+                        callback(trial)
+
+                # The best 1/eta of runs continue to next rung
+                if rung < len(rungs) - 1:
+                    active.sort(key=lambda t: t["metric"], reverse=True)
+                    keep = max(1, len(active) // self.eta)
+                    for trial in active[keep:]:
+                        trial["status"] = "stopped"
+                    active = active[:keep]
+
+    def summary(self):
+        """Returns rows of summary table sorted by number of played generations and metric (the best first). """
+
+        trials = sorted(self.trials, key=lambda t: (t["generations"], t["metric"] if t["metric"] is not None
+                                                     else -np.inf), reverse=True)
+        swept = list(self.params)
+
+        return [{
+            "rank": rank + 1,
+            "run": trial["run"],
+            **{name: trial["config"].get(name) for name in swept},
+            "seed": trial["config"]["seed"],
+            "generations": trial["generations"],
+            "metric": trial["metric"],
+            "best_fitness": max(trial["best_fitness"], default=None),
+            "score": trial["score"],
+            "steps_per_sec": trial["steps"] / trial["wall_time"] if trial["wall_time"] > 0 else 0.0,
+            "wall_time": trial["wall_time"],
+            "status": trial["status"],
+        } for rank, trial in enumerate(trials)]
+
+    def print_summary(self):
+        """Prints summary table. """
+
+        rows = self.summary()
+        if not rows:
+            return
+
+        def cell(value):
+            if isinstance(value, float):
+                return f"{value:.3f}"
+            return "-" if value is None else str(value)
+
+        columns = list(rows[0])
+        table = [columns] + [[cell(row[c]) for c in columns] for row in rows]
+        widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+        for line in table:
+            print("  ".join(value.rjust(width) for value, width in zip(line, widths)))
+
+    def write_summary(self):
+        """Writes summary table to summary.csv and config of the best run to best_config.json. Returns their paths. """
+
+        os.makedirs(self.directory, exist_ok=True)
+        rows = self.summary()
+
+        summary_path = os.path.join(self.directory, "summary.csv")
+        with open(summary_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        best_path = os.path.join(self.directory, "best_config.json")
+        best = next(trial for trial in self.trials if trial["run"] == rows[0]["run"])
+        ExperimentConfig.from_dict(best["config"]).save(best_path)
+
+        return summary_path, best_path
+
+
+def parse_args(args=None):
+    """Parses command line arguments. """
+
+    parser = argparse.ArgumentParser(description="spaceAI hyperparameter sweep with successive halving")
+    parser.add_argument("spec", help="JSON file with sweep spec (see sweep.py)")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--directory", default=SWEEP_DIR, help="directory for checkpoints and summaries of sweeps")
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    with open(args.spec) as f:
+        spec = json.load(f)
+    spec.setdefault("name", os.path.splitext(os.path.basename(args.spec))[0])
+
+    sweep = Sweep(spec, workers=args.workers, directory=args.directory)
+    print(f"{len(sweep.trials)} runs, rungs (generations): {sweep.rungs()}, workers: {sweep.workers}")
+
+    def report(trial):
+        print(f"run: {trial['run']}  generations: {trial['generations']}  metric: {trial['metric']:.3f}  "
+              f"params: {trial['config']}")
+
+    start = time.perf_counter()
+    sweep.run(callback=report)
+    elapsed = time.perf_counter() - start
+
+    print()
+    sweep.print_summary()
+    summary_path, best_path = sweep.write_summary()
+    print(f"\nsweep time: {elapsed:.1f} s  summary: {summary_path}  best config: {best_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Telemetry - per-generation statistics of training streamed to JSONL file by background writer thread
+"""
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+
+from settings import *
+
+
+def generation_record(population, score, wall_time, evaluations):
+    """
+    Returns statistics of played generation (before evolution): fitness and score distribution, stay / move
+    decision ratio (decisions made in this generation - survivors carry their counters over), number of mutations
+    of last evolution, wall time and evaluations per second.
+    """
+
+    store = population.store
+    fitness = store.fitness
+    pilot_score = store.pilot_score
+    stay = int((store.stay_decs_count - population.start_stay_decs_count).sum())
+    decs = stay + int((store.move_decs_count - population.start_move_decs_count).sum())
+    fitness_p50, fitness_p90, fitness_p99 = np.percentile(fitness, (50, 90, 99))
+    score_p50, score_p90 = np.percentile(pilot_score, (50, 90))
+
+    return {
+        "generation": population.generation_id,
+        "time": time.time(),
+        "game_score": int(score),
+        "fitness_best": float(fitness.max()),
+        "fitness_mean": float(fitness.mean()),
+        "fitness_p50": float(fitness_p50),
+        "fitness_p90": float(fitness_p90),
+        "fitness_p99": float(fitness_p99),
+        "score_min": int(pilot_score.min()),
+        "score_mean": float(pilot_score.mean()),
+        "score_p50": float(score_p50),
+        "score_p90": float(score_p90),
+        "score_max": int(pilot_score.max()),
+        "stay_ratio": stay / decs if decs else 0.0,
+        "move_ratio": 1 - stay / decs if decs else 0.0,
+        "mutations": population.mutations,
+        "wall_time": wall_time,
+        "evals_per_sec": evaluations / wall_time if wall_time > 0 else 0.0,
+    }
+
+
+class Telemetry:
+    """
+    Non-blocking telemetry sink. Statistics of every generation (see generation_record) are put to bounded queue and
+    appended to JSONL file (one JSON object per line) by background thread, so simulation never waits for disk.
+    When writer falls behind and queue is full, records are dropped (and counted) instead of blocking - memory stays
+    bounded however long the run is.
+
+    Methods:
+        - record - queues statistics of played generation
+        - close - writes queued records and stops writer thread
+    """
+
+    def __init__(self, path=TELEMETRY_PATH, queue_size=TELEMETRY_QUEUE):
+
+        self.path = path
+        self.records = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+        # Start of current generation (wall time of generation is measured between record calls)
+        self.last_time = time.perf_counter()
+
+        self.writer = threading.Thread(target=self.write, daemon=True)
+        self.writer.start()
+
+    def record(self, population, score, evaluations=None):
+        """Queues statistics of played generation (evaluations - number of played genomes, population size if None). """
+
+        now = time.perf_counter()
+        wall_time, self.last_time = now - self.last_time, now
+
+        evaluations = population.size if evaluations is None else evaluations
+        try:
+            self.records.put_nowait(generation_record(population, score, wall_time, evaluations))
+        except queue.Full:
+            self.dropped += 1
+
+    def write(self):
+        """Writer thread - appends queued records to file until None is received. """
+
+        with open(self.path, "a") as f:
+            while True:
+                record = self.records.get()
+                if record is None:
+                    break
+
+                f.write(json.dumps(record) + "\n")
+                if self.records.empty():
+                    f.flush()
+
+    def close(self):
+        """Writes queued records and stops writer thread. """
+
+        self.records.put(None)
+        self.writer.join()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Modules of the game live in repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def genomes():
+    """Genomes of population evolved until its best pilots survive 40 obstacles. """
+
+    from fused_kernel import FusedEvaluator
+    from game_classes import Population
+    from simulation_engine import SimulationEngine
+
+    population = Population(size=100, rng=np.random.default_rng(4))
+    population.populate()
+    engine = SimulationEngine(population=population, evaluator=FusedEvaluator(max_episode_score=40))
+    for i in range(30):
+        engine.run_generation()
+        population.evolve()
+
+    return population.store.genomes.copy()
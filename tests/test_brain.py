@@ -0,0 +1,24 @@
+import numpy as np
+
+from brain import PopulationBrain
+from game_classes import Population
+from settings import SCREEN_WIDTH
+
+
+def test_batched_network_equals_pilot_decide():
+    """Batched decisions (all pilots, selected pilots, pilots repeated as on many courses) equal Pilot.decide. """
+
+    population = Population(size=200, rng=np.random.default_rng(1))
+    population.populate()
+    brain = PopulationBrain(policy_table="off")
+    brain.load(population.store.genomes)
+    pilots = [ship.pilot for ship in population.ships_list]
+
+    rng = np.random.default_rng(2)
+    for idx in [np.arange(200), np.flatnonzero(rng.random(200) < 0.5), np.tile(np.arange(200), 3), np.arange(5)]:
+        x_ships = rng.integers(15, SCREEN_WIDTH - 15 + 1, len(idx))
+        gap_x1 = int(rng.integers(10, 500))
+        gap_x2 = gap_x1 + 120
+
+        expected = [pilots[i].decide(x, gap_x1, gap_x2) for i, x in zip(idx, x_ships)]
+        np.testing.assert_array_equal(brain.decide(x_ships, gap_x1, gap_x2, idx), expected)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from game_classes import Population
+from simulation_engine import SimulationEngine
+
+
+def new_engine(seed=3):
+    """Returns SimulationEngine with seeded population and episode tick limit. """
+
+    population = Population(size=60, rng=np.random.default_rng(seed))
+    population.populate()
+
+    return SimulationEngine(population=population, max_episode_ticks=2000)
+
+
+def test_resume_reproduces_run(tmp_path):
+    """Run resumed from checkpoint (load, then evolve - as train --resume) continues the same as uninterrupted run. """
+
+    path = str(tmp_path / "latest.npz")
+    expected, result = [], []
+
+    engine = new_engine()
+    for i in range(5):
+        engine.run_generation()
+        expected.append((engine.population.generation_id, engine.score, engine.population.store.fitness.copy()))
+        if i == 1:
+            engine.population.save(path)
+        engine.population.evolve()
+
+    # Population of resumed run is created with another seed - genomes and rng state come from checkpoint
+    engine = new_engine(seed=99)
+    engine.population.load(path)
+    engine.population.evolve()
+    for i in range(3):
+        engine.run_generation()
+        result.append((engine.population.generation_id, engine.score, engine.population.store.fitness.copy()))
+        engine.population.evolve()
+
+    for (gen_id, score, fitness), (wanted_gen_id, wanted_score, wanted_fitness) in zip(result, expected[2:]):
+        assert (gen_id, score) == (wanted_gen_id, wanted_score)
+        np.testing.assert_array_equal(fitness, wanted_fitness)
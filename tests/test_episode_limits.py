@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from event_simulator import EventSimulator
+from fused_kernel import FusedEvaluator
+from game_classes import Population
+from simulation_engine import SimulationEngine
+from vector_env import VectorEnv
+
+
+def play(genomes, max_episode_ticks, max_episode_score, evaluator=None, course_seed=11):
+    """Returns score, steps and pilots' results of one generation played with given evaluator. """
+
+    population = Population(size=len(genomes), rng=np.random.default_rng(0))
+    population.populate()
+    population.set_genomes(genomes)
+    engine = SimulationEngine(population=population, evaluator=evaluator, max_episode_ticks=max_episode_ticks,
+                              max_episode_score=max_episode_score)
+    engine.run_generation(course_seed)
+
+    store = population.store
+    return engine.score, engine.steps, store.pilot_score, store.fitness, store.stay_decs_count, store.move_decs_count
+
+
+@pytest.mark.parametrize("max_episode_ticks, max_episode_score", [(300, 0), (0, 10), (700, 15)])
+@pytest.mark.parametrize("make_evaluator", [
+    lambda ticks, score: EventSimulator(max_episode_ticks=ticks, max_episode_score=score),
+    lambda ticks, score: FusedEvaluator(backend="numpy", chunk=64, max_episode_ticks=ticks, max_episode_score=score),
+    lambda ticks, score: VectorEnv(1, max_episode_ticks=ticks, max_episode_score=score),
+])
+def test_evaluators_end_episode_like_engine(genomes, max_episode_ticks, max_episode_score, make_evaluator):
+    """Evaluators end generation at the same tick as SimulationEngine.step and finish living pilots the same way. """
+
+    expected = play(genomes, max_episode_ticks, max_episode_score)
+    result = play(genomes, max_episode_ticks, max_episode_score, make_evaluator(max_episode_ticks, max_episode_score))
+
+    assert np.count_nonzero(expected[2] == expected[0]) > 0     # some pilots were finished by the limit
+    assert result[:2] == expected[:2]
+    for actual, wanted in zip(result[2:], expected[2:]):
+        np.testing.assert_allclose(actual, wanted)
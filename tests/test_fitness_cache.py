@@ -0,0 +1,34 @@
+import numpy as np
+
+from fitness_cache import FitnessCache
+from game_classes import Population
+from simulation_engine import SimulationEngine
+
+
+def run_fitness(cache, generations=4, size=30, seed=0, course_seed=1):
+    """Returns fitness of every generation of seeded run on one course (with given fitness cache). """
+
+    population = Population(size=size, rng=np.random.default_rng(seed))
+    population.populate()
+    engine = SimulationEngine(population=population, course_seed=course_seed, fitness_cache=cache,
+                              max_episode_ticks=3000)
+
+    fitness = []
+    for i in range(generations):
+        engine.run_generation()
+        fitness.append(population.store.fitness.copy())
+        population.evolve()
+
+    return fitness
+
+
+def test_cache_smaller_than_generation():
+    """Results of survivors are reused even when playing the generation evicts them from cache. """
+
+    cache = FitnessCache(max_size=3)
+    fitness = run_fitness(cache)
+
+    assert len(cache) == 3
+    assert cache.hits > 0
+    for cached, played in zip(fitness, run_fitness(None)):
+        np.testing.assert_allclose(cached, played)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from fused_kernel import FusedEvaluator, NUMBA_AVAILABLE
+from game_classes import Population
+from simulation_engine import SimulationEngine
+
+
+def run(genomes, evaluator=None, generations=3, seed=5):
+    """Returns score, steps and fitness of every generation of seeded run evolved from given genomes. """
+
+    population = Population(size=len(genomes), rng=np.random.default_rng(seed))
+    population.populate()
+    population.set_genomes(genomes)
+    engine = SimulationEngine(population=population, evaluator=evaluator, max_episode_score=40)
+
+    results = []
+    for i in range(generations):
+        engine.run_generation()
+        store = population.store
+        results.append((engine.score, engine.steps, store.pilot_score.copy(), store.fitness.copy(),
+                        store.stay_decs_count.copy(), store.move_decs_count.copy()))
+        population.evolve()
+
+    return results
+
+
+@pytest.mark.parametrize("backend", [
+    "numpy",
+    pytest.param("numba", marks=pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba is not installed")),
+])
+def test_fused_run_equals_engine(genomes, backend):
+    """Seeded run evolved with fused kernel is the same as run played by SimulationEngine.step. """
+
+    expected = run(genomes)
+    result = run(genomes, FusedEvaluator(backend=backend, chunk=64, max_episode_score=40))
+
+    assert expected[-1][0] == 40    # the best pilots reach score limit
+    for actual, wanted in zip(result, expected):
+        assert actual[:2] == wanted[:2]
+        for a, w in zip(actual[2:], wanted[2:]):
+            np.testing.assert_allclose(a, w)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from brain import PopulationBrain
+from ext_functions import random_genomes
+from settings import SCREEN_WIDTH
+
+
+@pytest.mark.parametrize("mode", ["eager", "lazy"])
+def test_table_decisions_equal_network(mode):
+    """Decisions looked up in policy table are the same as decisions of networks evaluated every frame. """
+
+    rng = np.random.default_rng(0)
+    genomes = random_genomes(300, rng)
+
+    network = PopulationBrain(policy_table="off")
+    network.load(genomes)
+    table = PopulationBrain(policy_table=mode)
+    table.load(genomes)
+
+    # Frames of a few obstacles - living pilots at random x positions (lattice positions and others)
+    for gap_x1, gap_x2 in [(100, 200), (300, 420), (10, 90), (500, 630)]:
+        for frame in range(20):
+            idx = np.flatnonzero(rng.random(len(genomes)) < 0.7)
+            x_ships = rng.integers(15, SCREEN_WIDTH - 15 + 1, len(idx))
+            x_ships[::2] = table.table.positions[rng.integers(len(table.table.positions), size=len(x_ships[::2]))]
+
+            np.testing.assert_array_equal(table.decide(x_ships, gap_x1, gap_x2, idx),
+                                          network.decide(x_ships, gap_x1, gap_x2, idx))
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from replay import pack_decisions, unpack_decisions, Replay
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 4, 5, 7, 8, 1001])
+def test_pack_unpack_roundtrip(n):
+    """Decisions (all values 0 - 2, any length) are unpacked exactly as packed, 4 decisions per byte. """
+
+    decisions = np.random.default_rng(n).integers(0, 3, size=n).astype(np.uint8)
+    packed = pack_decisions(decisions)
+
+    assert len(packed) == -(-n // 4)
+    np.testing.assert_array_equal(unpack_decisions(packed, n), decisions)
+
+
+def test_replay_save_load(tmp_path):
+    """Saved replay is loaded with the same course seed and decisions. """
+
+    decisions = np.tile(np.array([0, 1, 2], dtype=np.uint8), 11)
+    path = str(tmp_path / "gen_000001.npz")
+    Replay(2 ** 32 - 1, decisions, generation_id=1, score=5, fitness=2.5).save(path)
+
+    replay = Replay.load(path)
+    assert replay.course_seed == 2 ** 32 - 1
+    assert (replay.generation_id, replay.score, replay.fitness) == (1, 5, 2.5)
+    np.testing.assert_array_equal(replay.decisions, decisions)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from game_classes import Population
+from simulation_engine import SimulationEngine
+from vector_env import VectorEnv
+
+
+def population_of(genomes):
+    """Returns population with given genomes and fresh decision counters. """
+
+    population = Population(size=len(genomes), rng=np.random.default_rng(0))
+    population.populate()
+    population.set_genomes(genomes)
+
+    return population
+
+
+@pytest.mark.parametrize("aggregate", ["mean", "min"])
+def test_courses_aggregate_like_engine(genomes, aggregate):
+    """VectorEnv with M courses gives aggregate of results of SimulationEngine played on every course separately. """
+
+    env = VectorEnv(3, aggregate, max_episode_score=30)
+
+    results = []
+    for course_seed in env.course_seeds(11):
+        engine = SimulationEngine(population=population_of(genomes), max_episode_score=30)
+        engine.run_generation(course_seed)
+        store = engine.population.store
+        results.append((engine.score, engine.steps, store.pilot_score.copy(), store.fitness.copy(),
+                        store.stay_decs_count.copy(), store.move_decs_count.copy()))
+    score, steps, pilot_score, fitness, stay_decs, move_decs = (np.array(r) for r in zip(*results))
+
+    population = population_of(genomes)
+    engine = SimulationEngine(population=population, evaluator=env, max_episode_score=30)
+    engine.run_generation(11)
+    store = population.store
+
+    assert (pilot_score[0] != pilot_score[1]).any()     # courses differ
+    assert (engine.score, engine.steps) == (score.max(), steps.max())
+    if aggregate == "mean":
+        np.testing.assert_allclose(store.fitness, fitness.mean(axis=0))
+        np.testing.assert_array_equal(store.pilot_score, np.rint(pilot_score.mean(axis=0)))
+    else:
+        np.testing.assert_allclose(store.fitness, fitness.min(axis=0))
+        np.testing.assert_array_equal(store.pilot_score, pilot_score.min(axis=0))
+    np.testing.assert_array_equal(store.stay_decs_count, stay_decs.sum(axis=0))
+    np.testing.assert_array_equal(store.move_decs_count, move_decs.sum(axis=0))
@@ -0,0 +1,163 @@
+"""
+--- SpaceAI headless training ---
+
+Evolves population of ships without opening the game window. Each generation is played with fixed simulated
+delta_time as fast as CPU allows.
+
+Usage:
+    python -m train --generations 100
+    python -m train --generations 100 --resume checkpoints/latest.npz
+    python -m train --generations 100 --courses 8 --aggregate min
+    python -m train --generations 100 --event-driven
+"""
+import argparse
+import time
+
+from simulation_engine import SimulationEngine
+from parallel_evaluation import ParallelEvaluator
+from vector_env import VectorEnv
+from event_simulator import EventSimulator
+from fused_kernel import FusedEvaluator
+from checkpoint import Checkpointer
+from fitness_cache import FitnessCache
+from telemetry import Telemetry
+from replay import ReplayRecorder
+from settings import CHECKPOINT_DIR, CHECKPOINT_EVERY, SEED, FITNESS_CACHE_SIZE, PHYSICS_DT, \
+    COURSES_PER_GENERATION, FITNESS_AGGREGATE, TELEMETRY_PATH, REPLAY_DIR, REPLAY_EVERY, MAX_EPISODE_TICKS, \
+    MAX_EPISODE_SCORE, EARLY_CUTOFF, POLICY_TABLE
+
+
+def parse_args(args=None):
+    """Parses command line arguments. """
+
+    parser = argparse.ArgumentParser(description="Headless spaceAI population training")
+    parser.add_argument("--generations", type=int, default=100, help="number of generations to evolve")
+    parser.add_argument("--seed", type=int, default=SEED, help="seed of random generator (same seed - same run)")
+    parser.add_argument("--course-seed", type=int,
+                        help="play every generation on the same obstacle course (default: new course each generation)")
+    parser.add_argument("--fitness-cache", type=int, default=0, metavar="SIZE",
+                        help=f"reuse results of genomes already played on the course, keeping up to SIZE results "
+                             f"(0 - off, e.g. {FITNESS_CACHE_SIZE}); useful with --course-seed")
+    parser.add_argument("--courses", type=int, default=COURSES_PER_GENERATION,
+                        help="number of obstacle courses every genome is played on in each generation")
+    parser.add_argument("--aggregate", choices=("mean", "min"), default=FITNESS_AGGREGATE,
+                        help="aggregate of fitness from all courses")
+    parser.add_argument("--event-driven", action="store_true",
+                        help="check collisions only when obstacles cross ships' line (same results, gain varies)")
+    parser.add_argument("--fused", action="store_true",
+                        help="play generations with fused kernel (Numba for small networks if installed, else numpy)")
+    parser.add_argument("--max-ticks", type=int, default=MAX_EPISODE_TICKS,
+                        help="end generation after n time steps, living pilots keep current score (0 - no limit)")
+    parser.add_argument("--max-score", type=int, default=MAX_EPISODE_SCORE,
+                        help="end generation when score reaches n (0 - no limit)")
+    parser.add_argument("--early-cutoff", action="store_true", default=EARLY_CUTOFF,
+                        help="end generation as soon as selection of top pilots can no longer change")
+    parser.add_argument("--policy-table", choices=("off", "eager", "lazy"), default=POLICY_TABLE,
+                        help="look decisions up in per-obstacle tables instead of evaluating networks every step")
+    parser.add_argument("--delta-time", type=float, default=PHYSICS_DT, help="simulated time step in seconds")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="number of worker processes evaluating population (0 - evaluate in this process)")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY,
+                        help="save checkpoint every n generations (0 - off)")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR, help="directory for checkpoint files")
+    parser.add_argument("--telemetry", default=TELEMETRY_PATH,
+                        help="JSONL file for per-generation statistics (empty - off)")
+    parser.add_argument("--replay-every", type=int, default=REPLAY_EVERY,
+                        help="record replay of the best pilot every n generations (0 - off, not with --courses > 1)")
+    parser.add_argument("--replay-dir", default=REPLAY_DIR, help="directory for replay files")
+    parser.add_argument("--resume", help="checkpoint file to resume training from")
+
+    args = parser.parse_args(args)
+
+    # Cache holds score and decisions of one course, fitness aggregated from many courses cannot be rebuilt from it
+    if args.fitness_cache and args.courses > 1:
+        parser.error("--fitness-cache cannot be used with --courses > 1")
+
+    # Generation is played by one evaluator (VectorEnv, EventSimulator or FusedEvaluator)
+    if (args.courses > 1) + args.event_driven + args.fused > 1:
+        parser.error("only one of --courses > 1, --event-driven and --fused can be used")
+
+    # Early cutoff is checked by SimulationEngine.step only (episode limits also by evaluators and worker shards)
+    if args.early_cutoff and (args.courses > 1 or args.event_driven or args.fused):
+        parser.error("early cutoff cannot be used with --courses, --event-driven or --fused")
+    if args.early_cutoff and args.workers:
+        parser.error("early cutoff needs selection of whole population, it cannot be used with --workers")
+
+    # Compiled fused kernel evaluates networks directly (policy table is used by brain.decide only)
+    if args.policy_table != "off" and args.fused:
+        parser.error("--policy-table cannot be used with --fused")
+
+    return args
+
+
+def report(engine):
+    """Prints summary of finished generation. """
+
+    best_fitness = max(ship.pilot.fitness for ship in engine.population.ships_list)
+    line = (f"gen_id: {engine.population.generation_id}  score: {engine.score}  "
+            f"best_fitness: {best_fitness:.3f}  steps: {engine.steps}")
+    if engine.fitness_cache is not None:
+        line += f"  cache hits/misses: {engine.fitness_cache.generation_hits}/{engine.fitness_cache.generation_misses}"
+    print(line)
+
+
+def main(args=None):
+    args = parse_args(args)
+
+    engine = SimulationEngine(delta_time=args.delta_time, seed=args.seed, course_seed=args.course_seed,
+                              fitness_cache=FitnessCache(args.fitness_cache) if args.fitness_cache else None,
+                              max_episode_ticks=args.max_ticks, max_episode_score=args.max_score,
+                              early_cutoff=args.early_cutoff)
+    engine.population.brain.use_policy_table(args.policy_table)
+    if args.workers:
+        engine.evaluator = ParallelEvaluator(engine.population.size, workers=args.workers,
+                                             delta_time=args.delta_time, courses=args.courses,
+                                             aggregate=args.aggregate, event_driven=args.event_driven,
+                                             fused=args.fused, max_episode_ticks=args.max_ticks,
+                                             max_episode_score=args.max_score)
+    elif args.courses > 1:
+        engine.evaluator = VectorEnv(args.courses, args.aggregate, delta_time=args.delta_time,
+                                     max_episode_ticks=args.max_ticks, max_episode_score=args.max_score)
+    elif args.event_driven:
+        engine.evaluator = EventSimulator(delta_time=args.delta_time, max_episode_ticks=args.max_ticks,
+                                          max_episode_score=args.max_score)
+    elif args.fused:
+        engine.evaluator = FusedEvaluator(delta_time=args.delta_time, max_episode_ticks=args.max_ticks,
+                                          max_episode_score=args.max_score)
+
+    # Checkpoint holds played generation, so training resumes with its evolution
+    if args.resume:
+        engine.population.load(args.resume)
+        engine.population.evolve()
+        print(f"Resumed from {args.resume} (gen_id: {engine.population.generation_id})")
+
+    checkpointer = Checkpointer(args.checkpoint_dir, args.checkpoint_every)
+    telemetry = Telemetry(args.telemetry) if args.telemetry else None
+
+    # Fitness from many courses is aggregated, replay of one course would not show it - replays are not recorded
+    replay_every = args.replay_every if args.courses == 1 else 0
+    replay_recorder = ReplayRecorder(args.replay_dir, replay_every, delta_time=args.delta_time,
+                                     max_episode_ticks=args.max_ticks, max_episode_score=args.max_score)
+
+    def on_generation(engine):
+        report(engine)
+        checkpointer.on_generation(engine.population)
+        replay_recorder.on_generation(engine.population, engine.played_course_seed)
+        if telemetry is not None:
+            telemetry.record(engine.population, engine.score, evaluations=engine.population.size * args.courses)
+
+    start = time.perf_counter()
+    try:
+        engine.run(args.generations, callback=on_generation)
+    finally:
+        checkpointer.close()
+        replay_recorder.close()
+        if telemetry is not None:
+            telemetry.close()
+        if engine.evaluator is not None:
+            engine.evaluator.close()
+    print(f"{args.generations} generations in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Vectorized environments - whole population plays M independent obstacle courses at once
+"""
+import numpy as np
+
+from settings import *
+from ext_functions import add_score_array
+from course import Course
+from game_classes import SHIP_MOVES
+
+
+OBSTACLE_THICKNESS = 20     # same as Obstacle.thickness
+SHIP_LINE_Y = 70            # y position of ships' centers, obstacle is passed below it (see ident_clos_obstacle)
+
+
+class VectorEnv:
+    """
+    Batch of M obstacle courses played by the whole population at once. Game rules are the same as in
+    SimulationEngine.step, but obstacles are held as (M, NO_OBSTACLES) arrays (gap_x1, gap_x2, position_y) and ships
+    as (M, population size) arrays, so one step of all courses is a few numpy operations and one batched brain pass.
+
+    Fitness of every pilot is calculated on every course (the same formula as ShipStore.calc_fitness) and aggregated
+    ("mean" or "min") into ShipStore.fitness, pilot_score holds aggregated score and decision counters get decisions
+    from all courses. Less noisy fitness means fewer generations are needed to converge.
+
+    First course is given by course seed (so with M = 1 results are the same as of SimulationEngine), the other
+    course seeds are derived from it. Episode limits (max_episode_ticks, max_episode_score, 0 - no limit) end every
+    course separately, living ships of ended course get pilot score for its score. Fitness cache cannot be used with
+    M > 1 - cached result is score of one course (see SimulationEngine.run_generation).
+
+    Can be used as SimulationEngine's evaluator (same interface as ParallelEvaluator).
+
+    Methods:
+        - course_seeds - returns seeds of M courses derived from course seed
+        - reset - sets up courses and ships for new generation
+        - step - advances all courses by one fixed time step
+        - evaluate - plays one generation of population on all courses
+        - close - does nothing (evaluator interface)
+    """
+
+    def __init__(self, courses=COURSES_PER_GENERATION, aggregate=FITNESS_AGGREGATE, delta_time=PHYSICS_DT,
+                 max_episode_ticks=MAX_EPISODE_TICKS, max_episode_score=MAX_EPISODE_SCORE):
+
+        if aggregate not in ("mean", "min"):
+            raise ValueError(f"Unknown fitness aggregate: {aggregate} (expected 'mean' or 'min')")
+
+        self.courses = courses
+        self.aggregate = aggregate
+        self.delta_time = delta_time
+        self.max_episode_ticks = max_episode_ticks
+        self.max_episode_score = max_episode_score
+
+        self.course_list = None
+        self.population = None
+
+    def course_seeds(self, course_seed):
+        """Returns seeds of M courses - course_seed and seeds derived from it. """
+
+        derived = np.random.SeedSequence(course_seed).generate_state(self.courses - 1, dtype=np.uint32)
+        return [course_seed] + [int(seed) for seed in derived]
+
+    def reset(self, population, course_seed, skip_mask=None):
+        """Sets up obstacles of M courses and ships (ships selected by skip_mask are dead from the start). """
+
+        m, size = self.courses, population.size
+        self.population = population
+
+        # --- Obstacles (M, NO_OBSTACLES) ---
+        self.course_list = [Course(seed) for seed in self.course_seeds(course_seed)]
+        gaps = [course.gaps(NO_OBSTACLES) for course in self.course_list]
+        for course in self.course_list:
+            course.cursor = NO_OBSTACLES
+
+        self.gap_x1 = np.array([gap_x1 for gap_x1, gap_x2 in gaps])
+        self.gap_x2 = np.array([gap_x2 for gap_x1, gap_x2 in gaps])
+        self.position_y = np.tile(np.arange(NO_OBSTACLES, dtype=float) * OBSTACLE_FREQ + SCREEN_HEIGHT, (m, 1))
+        self.speed = np.full(m, OBSTACLE_SPEED)
+        self.closest = np.zeros(m, dtype=np.int64)
+        self.score = np.zeros(m, dtype=np.int64)
+
+        # --- Ships (M, population size) ---
+        self.position_x = np.full((m, size), int(SCREEN_WIDTH / 2), dtype=np.int64)
+        self.alive = np.ones((m, size), dtype=bool)
+        if skip_mask is not None:
+            self.alive[:, skip_mask] = False
+        self.pilot_score = np.zeros((m, size), dtype=np.int64)
+        self.stay_decs_count = np.zeros((m, size), dtype=np.int64)
+        self.move_decs_count = np.zeros((m, size), dtype=np.int64)
+
+        self.steps = 0
+
+    def step(self):
+        """Advances all courses by one time step. Returns True when all ships on all courses are dead. """
+
+        rows = np.arange(self.courses)
+        store = self.population.store
+
+        # --- Collisions with closest obstacles ---
+        clo_x1 = self.gap_x1[rows, self.closest]
+        clo_x2 = self.gap_x2[rows, self.closest]
+        bot_edge = self.position_y[rows, self.closest] - OBSTACLE_THICKNESS * 0.5
+
+        x = self.position_x
+        hit = (self.alive & (store.center_y >= bot_edge)[:, None] &
+               (((0 <= x) & (x <= clo_x1[:, None])) | ((clo_x2[:, None] <= x) & (x <= SCREEN_WIDTH))))
+        self.alive[hit] = False
+        self.pilot_score[hit] = np.broadcast_to(self.score[:, None], hit.shape)[hit]
+
+        # --- Episode limits (same as CollisionSystem.check_episode_end, for every course) ---
+        ended = np.full(self.courses, bool(self.max_episode_ticks and self.steps >= self.max_episode_ticks))
+        if self.max_episode_score:
+            ended |= self.score >= self.max_episode_score
+        finished = self.alive & ended[:, None]
+        self.alive[finished] = False
+        self.pilot_score[finished] = np.broadcast_to(self.score[:, None], finished.shape)[finished]
+
+        # Courses with living ships are still played
+        running = self.alive.any(axis=1)
+        if not running.any():
+            return True
+
+        # --- Passing obstacles (+1 point, obstacles accelerate every 50 points) ---
+        passed = running & (self.position_y[rows, self.closest] < SHIP_LINE_Y)
+        self.closest[passed] = (self.closest[passed] + 1) % NO_OBSTACLES
+        self.score[passed] += 1
+        self.speed[passed & (self.score % 50 == 0)] += 50
+
+        # --- Ships' decisions and movement ---
+        course_idx, ship_idx = np.nonzero(self.alive)
+        closest = self.closest[course_idx]
+        decisions = self.population.brain.decide(x[course_idx, ship_idx], self.gap_x1[course_idx, closest],
+                                                 self.gap_x2[course_idx, closest], ship_idx)
+
+        stay = decisions == 0
+        self.stay_decs_count[course_idx, ship_idx] += stay
+        self.move_decs_count[course_idx, ship_idx] += ~stay
+
+        x[course_idx, ship_idx] += SHIP_MOVES[decisions]
+        np.clip(x, store.half_width, SCREEN_WIDTH - store.half_width, out=x)
+
+        # --- Obstacles movement (obstacles below the screen are respawned with next gap of their course) ---
+        self.position_y[running] -= (self.speed[running] * self.delta_time)[:, None]
+        for i, j in zip(*np.nonzero(self.position_y < 0)):
+            self.gap_x1[i, j], self.gap_x2[i, j] = self.course_list[i].next_gap()
+            self.position_y[i, j] = SCREEN_HEIGHT + OBSTACLE_FREQ
+
+        self.steps += 1
+        return False
+
+    def evaluate(self, population, course_seed, skip_mask=None):
+        """
+        Plays one generation of population on M courses (except ships selected by optional skip_mask) and writes
+        aggregated results to population's ShipStore. All ships are dead afterwards.
+        Returns: best game score of all courses and number of steps
+        """
+
+        self.reset(population, course_seed, skip_mask)
+        while not self.step():
+            pass
+
+        store = population.store
+        played = np.ones(population.size, dtype=bool) if skip_mask is None else ~skip_mask
+
+        # Fitness on every course (decision counters include decisions from previous generations, see calc_fitness)
+        stay = store.stay_decs_count[played] + self.stay_decs_count[:, played]
+        decs = stay + store.move_decs_count[played] + self.move_decs_count[:, played]
+        score = self.pilot_score[:, played]
+        moves_distr_score = np.divide(stay, decs, out=np.zeros(stay.shape), where=(score > 3) & (decs > 0))
+        fitness = score + add_score_array(moves_distr_score, store.stay_frac)
+
+        if self.aggregate == "min":
+            store.fitness[played] = fitness.min(axis=0)
+            store.pilot_score[played] = score.min(axis=0)
+        else:
+            store.fitness[played] = fitness.mean(axis=0)
+            store.pilot_score[played] = np.rint(score.mean(axis=0))
+
+        store.stay_decs_count[played] += self.stay_decs_count[:, played].sum(axis=0)
+        store.move_decs_count[played] += self.move_decs_count[:, played].sum(axis=0)
+
+        store.alive[:] = False
+        population.check_if_all_dead()
+
+        return int(self.score.max()), self.steps
+
+    def close(self):
+        """Nothing to release (evaluator interface, see ParallelEvaluator.close). """